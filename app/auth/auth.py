@@ -2,14 +2,21 @@
 # pip install python-jose[cryptography]
 
 
+import hashlib
+import secrets
 from datetime import datetime, timedelta
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
-from sqlmodel import Session
-from typing import Annotated
+from sqlmodel import Session, select, update
+from typing import Annotated, Optional
 
+from app.config import settings
+from app.core.cache import TTLCache
+from app.models.refresh_tokens import RefreshToken
 from app.models.users import User
+from app.schemas.token import TokenData
+from app.schemas.users import UserRead
 from app.db.database import get_session
 
 # Configuración del token JWT
@@ -17,9 +24,32 @@ SECRET_KEY = "super-secret-key"  # Asegúrate de almacenarlo en variables de ent
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 55
 
+ROLES_ADMIN = ("admin", "superadmin")
+
 # Usamos HTTPBearer en lugar de OAuth2PasswordBearer para permitir el ingreso manual del token.
 bearer_scheme = HTTPBearer()
 
+# Usuarios ya resueltos (id, username, email, role), por id. Los handlers que
+# cambian o borran un usuario llaman a invalidar_usuario(); en otro worker el
+# cambio se ve cuando vence el TTL.
+usuarios_cache = TTLCache(
+    maxsize=settings.AUTH_CACHE_MAXSIZE,
+    ttl=settings.AUTH_CACHE_TTL,
+)
+
+# Versión vigente de los tokens de cada usuario (User.token_version), por id.
+# Un token cuyo claim "ver" no coincide fue emitido antes de un cambio de rol o
+# de contraseña y se rechaza.
+versiones_cache = TTLCache(
+    maxsize=settings.AUTH_CACHE_MAXSIZE,
+    ttl=settings.AUTH_CACHE_TTL,
+)
+
+
+def invalidar_usuario(user_id: int) -> None:
+    usuarios_cache.pop(user_id)
+    versiones_cache.pop(user_id)
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -27,41 +57,105 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(
-    credentials: Annotated[HTTPAuthorizationCredentials, Depends(bearer_scheme)],
-    session: Annotated[Session, Depends(get_session)]
-) -> User:
-    token = credentials.credentials
+def token_usuario(user: User) -> str:
+    """Access token con el rol y la versión de tokens vigente del usuario."""
+    return create_access_token({"sub": str(user.id), "role": user.role, "ver": user.token_version})
+
+def hash_refresh_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def nuevo_refresh_token(session, user_id: int, familia: Optional[str] = None) -> str:
+    """
+    Agrega a la sesión (sync o async) un refresh token para el usuario y lo
+    devuelve; queda guardado al hacer commit. Sin familia, inicia una nueva.
+    """
+    token = secrets.token_urlsafe(32)
+    session.add(RefreshToken(
+        user_id=user_id,
+        token_hash=hash_refresh_token(token),
+        familia=familia or secrets.token_hex(16),
+        expira=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    return token
+
+def revocar_refresh_tokens(user_id: int):
+    """Sentencia que revoca todos los refresh tokens del usuario (p. ej. al cambiar la contraseña)."""
+    return (
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revocado == False)
+        .values(revocado=True)
+    )
+
+def credenciales_invalidas(detalle: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detalle,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def decodificar_token(token: str) -> TokenData:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: int | None = payload.get("sub")
         if user_id is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token inválido: falta el claim 'sub'",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-    except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token inválido",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    user = session.get(User, user_id)
-    if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="No se encontró el usuario correspondiente al token",
-            headers={"WWW-Authenticate": "Bearer"},
+            raise credenciales_invalidas("Token inválido: falta el claim 'sub'")
+        return TokenData(id=int(user_id), role=payload.get("role"), ver=payload.get("ver"))
+    except (JWTError, ValueError):
+        raise credenciales_invalidas("Token inválido")
+
+def version_vigente(session: Session, user_id: int) -> Optional[int]:
+    """Versión de tokens del usuario; None si el usuario no existe."""
+    version = versiones_cache.get(user_id)
+    if version is None:
+        version = session.exec(select(User.token_version).where(User.id == user_id)).first()
+        if version is None:
+            return None
+        versiones_cache.set(user_id, version)
+    return version
+
+def _verificar_version(session: Session, datos: TokenData) -> None:
+    # Los tokens emitidos antes de los claims no traen "ver"
+    if datos.ver is not None and datos.ver != version_vigente(session, datos.id):
+        raise credenciales_invalidas("Token revocado: vuelva a iniciar sesión")
+
+def get_current_user(
+    credentials: Annotated[HTTPAuthorizationCredentials, Depends(bearer_scheme)],
+    session: Annotated[Session, Depends(get_session)]
+) -> UserRead:
+    datos = decodificar_token(credentials.credentials)
+    user_id = datos.id
+
+    principal = usuarios_cache.get(user_id)
+    if principal is None:
+        user = session.get(User, user_id)
+        if user is None:
+            raise credenciales_invalidas("No se encontró el usuario correspondiente al token")
+        # Sin validar: el email ya se validó al crear el usuario
+        principal = UserRead.model_construct(
+            id=user.id, username=user.username, email=user.email, role=user.role
         )
-    return user
+        usuarios_cache.set(user_id, principal)
+        versiones_cache.set(user_id, user.token_version)
 
-def require_admin(user: User = Depends(get_current_user)) -> User:
-    if user.role != "admin" and user.role !="superadmin":
+    _verificar_version(session, datos)
+    return principal
+
+def require_admin(
+    credentials: Annotated[HTTPAuthorizationCredentials, Depends(bearer_scheme)],
+    session: Annotated[Session, Depends(get_session)]
+) -> TokenData:
+    datos = decodificar_token(credentials.credentials)
+    if datos.role is None or datos.ver is None:
+        # Token emitido antes de los claims de rol (vence en ACCESS_TOKEN_EXPIRE_MINUTES)
+        user = get_current_user(credentials, session)
+        datos = TokenData(id=user.id, role=user.role)
+    else:
+        # El rol viene firmado en el token: solo se compara la versión (en caché)
+        _verificar_version(session, datos)
+
+    if datos.role not in ROLES_ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="No tienes permisos de administrador",
         )
-    return user
-
+    return datos
@@ -42,6 +42,72 @@ class Settings(BaseSettings):
     
     cors_origins: str  # se leerá como texto desde la variable de entorno
 
+    # ----------------------------------------
+    # Caché del catálogo de cursos
+    # ----------------------------------------
+
+    CATALOGO_CACHE_MAXSIZE: int = 1024  # Cantidad máxima de respuestas guardadas
+    CATALOGO_CACHE_TTL: int = 300  # Segundos de vida de cada respuesta
+    CATALOGO_VERSION_TTL: float = 1.0  # Segundos entre lecturas de la versión compartida del catálogo
+
+    # ----------------------------------------
+    # Caché de usuarios autenticados (get_current_user)
+    # ----------------------------------------
+
+    AUTH_CACHE_MAXSIZE: int = 10000  # Usuarios guardados por worker
+    AUTH_CACHE_TTL: int = 60  # Segundos hasta volver a leer el usuario de la base
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30  # Vida de los refresh tokens (se renuevan en cada /refresh)
+
+    # ----------------------------------------
+    # Hash de contraseñas (bcrypt)
+    # ----------------------------------------
+
+    BCRYPT_ROUNDS: int = 12  # Costo de bcrypt; al cambiarlo, los hashes se regeneran en el siguiente login
+    BCRYPT_WORKERS: int = 2  # Procesos dedicados a bcrypt por worker de la app
+
+    # ----------------------------------------
+    # Límites de los endpoints que calculan bcrypt (/login, POST /users/, /mp/checkout)
+    # ----------------------------------------
+
+    HASH_RATE_PER_IP: int = 20  # Intentos por minuto desde una misma IP
+    HASH_RATE_PER_ACCOUNT: int = 5  # Intentos por minuto sobre un mismo email
+    HASH_MAX_CONCURRENT: int = 8  # Requests calculando bcrypt a la vez, por worker
+    RATE_LIMIT_BACKEND: str = "app.core.limites:Memoria"  # Clase que guarda las cubetas ("modulo:Clase")
+    TRUSTED_PROXY_HOPS: int = 1  # Proxies propios delante de la app (el router de la plataforma); 0 si se expone directo
+
+    # ----------------------------------------
+    # Pool de conexiones (por worker y por engine: sync y async)
+    # ----------------------------------------
+
+    DB_POOL_SIZE: int = 5  # Conexiones que se mantienen abiertas
+    DB_MAX_OVERFLOW: int = 10  # Conexiones extra permitidas en picos de tráfico
+    DB_POOL_TIMEOUT: float = 30  # Segundos de espera por una conexión libre antes de fallar
+    DB_POOL_RECYCLE: int = 1800  # Segundos tras los cuales se reemplaza una conexión
+    DB_POOL_PRE_PING: bool = True  # Verifica la conexión antes de usarla (descarta las cerradas por el proveedor)
+
+    # ----------------------------------------
+    # Log de SQL
+    # ----------------------------------------
+
+    DB_ECHO: bool = False  # Imprime cada sentencia SQL (solo para depurar en local)
+    SLOW_QUERY_MS: float = 200  # Las sentencias más lentas que esto van al log de consultas lentas
+    QUERY_BUDGET: int = 20  # Sentencias por request a partir de las cuales se registra un aviso
+    N1_THRESHOLD: int = 5  # Repeticiones de la misma sentencia en un request que se consideran N+1
+
+    # ----------------------------------------
+    # Réplicas de lectura
+    # ----------------------------------------
+
+    DATABASE_REPLICA_URLS: str = ""  # URLs separadas por coma; vacío = todo va a la primaria
+    DB_REPLICA_RETRY: float = 30  # Segundos que una réplica caída queda fuera de la rotación
+    DB_REPLICA_STICKY: float = 5  # Segundos tras una escritura en los que ese cliente lee de la primaria
+
+    # ----------------------------------------
+    # Migraciones (python -m app.db.migraciones)
+    # ----------------------------------------
+
+    DB_AUTO_MIGRATE: bool = False  # Aplicar las migraciones pendientes al arrancar (solo desarrollo)
+
     class Config:
         env_file = ".env"  # opcional, para desarrollo local
 
@@ -0,0 +1,70 @@
+# app/core/cache.py
+
+# Caché en memoria del proceso, acotada por tamaño (LRU) y por tiempo de vida (TTL).
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class TTLCache:
+    def __init__(self, maxsize: int = 1024, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._datos: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entrada = self._datos.get(key)
+            if entrada is None:
+                self.misses += 1
+                return default
+            vence, valor = entrada
+            if vence <= time.monotonic():
+                del self._datos[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._datos.move_to_end(key)
+            self.hits += 1
+            return valor
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._datos[key] = (time.monotonic() + self.ttl, value)
+            self._datos.move_to_end(key)
+            while len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            if self._datos.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self.invalidations += len(self._datos)
+            self._datos.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                "size": len(self._datos),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / consultas, 4) if consultas else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,32 @@
+# app/core/etag.py
+
+# Soporte de GET condicional (ETag / If-None-Match).
+
+from typing import Optional
+
+from fastapi import Request, Response
+
+
+def coincide(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparación débil de ETags, como indica la RFC 9110 para If-None-Match."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    actual = etag.removeprefix("W/")
+    return any(
+        candidato.strip().removeprefix("W/") == actual
+        for candidato in if_none_match.split(",")
+    )
+
+
+def no_modificado(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Devuelve una respuesta 304 si el cliente ya tiene la versión `etag`.
+    En caso contrario agrega el ETag a la respuesta y devuelve None.
+    """
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if coincide(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,115 @@
+# app/core/limites.py
+
+# Control de admisión de los endpoints que calculan bcrypt.
+# Cada intento consume un token de dos cubetas (token bucket): una por IP y otra
+# por cuenta (email), que se recargan a HASH_RATE_PER_IP / HASH_RATE_PER_ACCOUNT
+# tokens por minuto. Además hay un máximo de requests calculando bcrypt a la vez
+# (HASH_MAX_CONCURRENT). Si algo no alcanza se responde 429 con Retry-After
+# antes de tocar bcrypt.
+#
+# Las cubetas viven en un backend: por defecto en memoria del proceso (cada
+# worker cuenta por separado). Para compartirlas entre workers se configura
+# RATE_LIMIT_BACKEND con una clase que implemente `consumir`, p. ej. sobre Redis.
+
+import importlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import HTTPException, Request, status
+
+from app.config import settings
+
+MAX_CUBETAS = 100_000  # cubetas en memoria; se descartan las usadas hace más tiempo
+
+
+class Memoria:
+    """Cubetas en memoria del proceso."""
+
+    def __init__(self):
+        self._cubetas: "OrderedDict[str, tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def consumir(self, clave: str, capacidad: float, por_segundo: float) -> float:
+        """Consume un token: 0 si había, o los segundos hasta que haya uno."""
+        ahora = time.monotonic()
+        with self._lock:
+            tokens, antes = self._cubetas.pop(clave, (capacidad, ahora))
+            tokens = min(capacidad, tokens + (ahora - antes) * por_segundo)
+            if tokens >= 1:
+                tokens -= 1
+                espera = 0.0
+            else:
+                espera = (1 - tokens) / por_segundo
+            self._cubetas[clave] = (tokens, ahora)
+            while len(self._cubetas) > MAX_CUBETAS:
+                self._cubetas.popitem(last=False)
+        return espera
+
+
+def cargar_backend(ruta: str):
+    modulo, _, clase = ruta.partition(":")
+    return getattr(importlib.import_module(modulo), clase)()
+
+
+backend = cargar_backend(settings.RATE_LIMIT_BACKEND)
+
+_en_curso = 0
+
+
+def _demasiados(espera: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Demasiados intentos, vuelva a intentar más tarde",
+        headers={"Retry-After": str(max(1, math.ceil(espera)))},
+    )
+
+
+def ip_cliente(request: Request) -> str:
+    """
+    IP del cliente para las cubetas por IP.
+
+    Cada proxy agrega al final de X-Forwarded-For la IP que le abrió la conexión,
+    así que solo son confiables las TRUSTED_PROXY_HOPS entradas de la derecha: lo
+    que está a la izquierda lo manda el cliente y lo puede inventar.
+    """
+    saltos = settings.TRUSTED_PROXY_HOPS
+    if saltos:
+        reenviado = [ip.strip() for ip in request.headers.get("x-forwarded-for", "").split(",") if ip.strip()]
+        if len(reenviado) >= saltos:
+            return reenviado[-saltos]
+    return request.client.host if request.client else "desconocida"
+
+
+@asynccontextmanager
+async def admitir(request: Request, ruta: str, cuenta: Optional[str] = None):
+    """
+    Envuelve el trabajo de bcrypt de un endpoint:
+
+        async with limites.admitir(request, "login", cuenta=data.email):
+            ...
+    """
+    global _en_curso
+    espera = await backend.consumir(
+        f"{ruta}:ip:{ip_cliente(request)}", settings.HASH_RATE_PER_IP, settings.HASH_RATE_PER_IP / 60
+    )
+    if espera:
+        raise _demasiados(espera)
+    if cuenta:
+        espera = await backend.consumir(
+            f"{ruta}:cuenta:{cuenta.lower()}", settings.HASH_RATE_PER_ACCOUNT, settings.HASH_RATE_PER_ACCOUNT / 60
+        )
+        if espera:
+            raise _demasiados(espera)
+
+    # Sin esperar un lugar: con todos ocupados, encolar solo agranda la latencia
+    if _en_curso >= settings.HASH_MAX_CONCURRENT:
+        raise _demasiados(1)
+    _en_curso += 1
+    try:
+        yield
+    finally:
+        _en_curso -= 1
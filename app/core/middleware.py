@@ -0,0 +1,127 @@
+# app/core/middleware.py
+
+# Cuenta las sentencias SQL de cada request (ver app.db.metricas) y las informa
+# en el header Server-Timing. Si un request supera QUERY_BUDGET sentencias, o
+# repite la misma huella más de N1_THRESHOLD veces (el patrón N+1), se registra
+# un aviso con la ruta.
+#
+# LecturasPrimariaMiddleware: después de una escritura, manda a la primaria las
+# lecturas del mismo cliente durante unos segundos (ver app.db.replicas).
+
+import json
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.db.metricas import ConsultasRequest, consultas_request, logger_json
+from app.db.replicas import LecturasRequest, lecturas_request
+
+logger = logger_json("app.db.requests")
+
+
+class ConsultasPorRequestMiddleware:
+    def __init__(self, app: ASGIApp, presupuesto: int, repeticiones: int):
+        self.app = app
+        self.presupuesto = presupuesto
+        self.repeticiones = repeticiones
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        consultas = ConsultasRequest()
+        token = consultas_request.set(consultas)
+        inicio = time.perf_counter()
+
+        async def enviar(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                total_ms = (time.perf_counter() - inicio) * 1000
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={consultas.total * 1000:.1f};desc="{consultas.cantidad} queries", '
+                    f"app;dur={total_ms:.1f}",
+                )
+                self._revisar(scope, consultas)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            consultas_request.reset(token)
+
+    def _revisar(self, scope: Scope, consultas: ConsultasRequest) -> None:
+        ruta = getattr(scope.get("route"), "path", scope["path"])
+        if consultas.cantidad > self.presupuesto:
+            logger.warning(json.dumps({
+                "event": "query_budget",
+                "method": scope["method"],
+                "route": ruta,
+                "queries": consultas.cantidad,
+                "budget": self.presupuesto,
+                "db_ms": round(consultas.total * 1000, 3),
+            }, ensure_ascii=False))
+        if consultas.por_huella:
+            huella, veces = consultas.por_huella.most_common(1)[0]
+            if veces > self.repeticiones:
+                logger.warning(json.dumps({
+                    "event": "n_plus_1",
+                    "method": scope["method"],
+                    "route": ruta,
+                    "repeats": veces,
+                    "fingerprint": huella,
+                }, ensure_ascii=False))
+
+
+class LecturasPrimariaMiddleware:
+    """
+    Si el request hizo commit, la respuesta lleva hasta cuándo (epoch) el cliente
+    tiene que leer de la primaria, en la cookie primaria_hasta y en el header X-Primaria-Hasta.
+    Los navegadores devuelven la cookie; otros clientes pueden reenviar el header.
+    """
+
+    NOMBRE = "primaria_hasta"
+    HEADER = "X-Primaria-Hasta"
+
+    def __init__(self, app: ASGIApp, ventana: float):
+        self.app = app
+        self.ventana = ventana
+
+    def _vigente(self, scope: Scope) -> bool:
+        conexion = HTTPConnection(scope)
+        marca = conexion.headers.get(self.HEADER) or conexion.cookies.get(self.NOMBRE)
+        try:
+            marca = float(marca)
+        except (TypeError, ValueError):
+            return False
+        # Una marca más lejana que la ventana no la puso este servidor: se
+        # ignora, para que un cliente no quede leyendo de la primaria para siempre
+        ahora = time.time()
+        return ahora < marca <= ahora + self.ventana
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.ventana:
+            await self.app(scope, receive, send)
+            return
+
+        lecturas = LecturasRequest(primaria=self._vigente(scope))
+        token = lecturas_request.set(lecturas)
+
+        async def enviar(message: Message) -> None:
+            if message["type"] == "http.response.start" and lecturas.escribio:
+                hasta = f"{time.time() + self.ventana:.3f}"
+                headers = MutableHeaders(scope=message)
+                headers.append(self.HEADER, hasta)
+                headers.append(
+                    "Set-Cookie",
+                    f"{self.NOMBRE}={hasta}; Max-Age={max(1, round(self.ventana))}; Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            lecturas_request.reset(token)
@@ -3,10 +3,29 @@
 # Se deben instalar las dependencias necesarias:
 # pip install passlib[bcrypt]
 
+# bcrypt tarda cientos de milisegundos por hash a propósito. Los endpoints
+# async usan hash_password / verify_and_update, que lo ejecutan en un pool de
+# procesos acotado (BCRYPT_WORKERS): ni el event loop ni el threadpool de los
+# handlers sync quedan ocupados, y un pico de logins no puede usar más CPU que
+# esos procesos.
+
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
 from passlib.context import CryptContext
 
+from app.config import settings
+
 # bcrypt es el algoritmo que usaremos (seguro y probado)
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Con deprecated="auto" los hashes con otro costo quedan marcados para regenerar
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+)
 
 
 def get_password_hash(password: str) -> str:
@@ -14,4 +33,48 @@ def get_password_hash(password: str) -> str:
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+# --- Pool de procesos ---
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _pool() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: el proceso hijo no hereda los hilos ni las conexiones del worker
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.BCRYPT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def cerrar_pool() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(cancel_futures=True)
+            _executor = None
+
+
+async def hash_password(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_pool(), get_password_hash, password)
+
+
+async def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    (válida, nuevo_hash). nuevo_hash no es None si la contraseña es válida y el
+    hash guardado usa otro costo: hay que guardarlo en lugar del anterior.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_pool(), _verify_and_update, plain_password, hashed_password)
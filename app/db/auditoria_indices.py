@@ -0,0 +1,179 @@
+# app/db/auditoria_indices.py
+
+# Auditoría de índices.
+# Ejecuta EXPLAIN sobre las consultas frecuentes de cada router e informa las
+# que recorren una tabla completa (Seq Scan / SCAN). En PostgreSQL se desactiva
+# enable_seqscan durante el EXPLAIN: con tablas chicas el planner elige Seq Scan
+# aunque exista el índice. Sin Seq Scan el planner puede recorrer la tabla entera
+# por otro índice (típicamente la PK) y filtrar fila por fila, así que también
+# se informan los Index Scan / Index Only Scan / Bitmap Heap Scan con Filter y
+# sin condición de índice.
+# También lista los índices declarados en los modelos que faltan en la base.
+#
+#   python -m app.db.auditoria_indices           # informe (sale con código 1 si hay recorridos completos)
+#   python -m app.db.auditoria_indices --crear   # crea los índices faltantes (CONCURRENTLY en PostgreSQL)
+
+import argparse
+import json
+import sys
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import Index, inspect, or_, text
+from sqlalchemy.engine import Connection
+from sqlmodel import SQLModel, select
+
+from app.db.database import engine
+from app.models.cursos import Curso
+from app.models.cursos_categorias import CursoCategoria
+from app.models.profiles import Profile
+from app.models.user_payment import UserPayment
+from app.models.users import User
+from app.schemas.cursos import CursoFiltros
+from app.services import catalogo
+
+# (router, endpoint, consulta); los valores son de ejemplo, solo importa el plan
+CONSULTAS: List[Tuple[str, str, Callable]] = [
+    ("cursos", "GET /cursos?profesor_id=", lambda: catalogo.aplicar_filtros(
+        select(Curso), CursoFiltros(profesor_id=1)).order_by(Curso.id)),
+    ("cursos", "GET /cursos?categoria_id=", lambda: catalogo.aplicar_filtros(
+        select(Curso), CursoFiltros(categoria_id=1)).order_by(Curso.id)),
+    ("cursos", "GET /cursos/destacados", lambda: select(Curso)
+        .where(Curso.destacado == True).order_by(Curso.id)),
+    ("cursos", "GET /cursos/profesor/{id}", lambda: select(Curso)
+        .where(Curso.profesor_id == 1).order_by(Curso.id)),
+    ("cursos", "GET /cursos/categoria/{id}", lambda: select(Curso)
+        .join(CursoCategoria, CursoCategoria.curso_id == Curso.id)
+        .where(CursoCategoria.categoria_id == 1).order_by(Curso.id)),
+    ("cursos", "GET /cursos/batch", lambda: select(Curso).where(Curso.id.in_([1, 2, 3]))),
+    ("categorias", "DELETE /categorias/{id}", lambda: select(CursoCategoria.curso_id)
+        .where(CursoCategoria.categoria_id == 1)),
+    ("profesores", "DELETE /profesores/{id}", lambda: select(Curso.id)
+        .where(Curso.profesor_id == 1)),
+    ("profiles", "GET /profile", lambda: select(Profile).where(Profile.user_id == 1)),
+    ("auth", "POST /login", lambda: select(User).where(User.email == "a@a.com")),
+    ("auth", "POST /login (perfil)", lambda: select(Profile).where(Profile.user_id.in_([1]))),
+    ("users", "POST /users", lambda: select(User)
+        .where(or_(User.email == "a@a.com", User.username == "a"))),
+    ("user_payments", "GET /userpayments/user_payments?user_id=", lambda: select(UserPayment)
+        .where(UserPayment.user_id == 1)),
+    ("user_payments", "GET /userpayments/user_payments?user_id=&status=", lambda: select(UserPayment)
+        .where(UserPayment.user_id == 1, UserPayment.status == "approved")),
+    ("user_payments", "GET /userpayments/user_payments?user_id=&status=&curso_id=", lambda: select(UserPayment)
+        .where(UserPayment.user_id == 1, UserPayment.status == "approved", UserPayment.curso_id == 1)),
+    ("user_payments", "GET /userpayments/user_payments?curso_id=", lambda: select(UserPayment)
+        .where(UserPayment.curso_id == 1)),
+    ("payments", "GET /mp/success", lambda: select(UserPayment)
+        .where(UserPayment.payment_id == "1")),
+]
+
+
+def _nodos(plan: dict):
+    yield plan
+    for hijo in plan.get("Plans", ()):
+        yield from _nodos(hijo)
+
+
+# Nodos que leen por índice y la condición que indica que el índice acota la búsqueda
+CONDICION_INDICE = {
+    "Index Scan": "Index Cond",
+    "Index Only Scan": "Index Cond",
+    "Bitmap Heap Scan": "Recheck Cond",
+}
+
+
+def _recorrido(nodo: dict) -> Optional[str]:
+    tipo = nodo["Node Type"]
+    if tipo == "Seq Scan":
+        return f"Seq Scan en {nodo['Relation Name']}"
+    condicion = CONDICION_INDICE.get(tipo)
+    if condicion and "Filter" in nodo and condicion not in nodo:
+        return f"{tipo} con Filter en {nodo['Relation Name']}"
+    return None
+
+
+def recorridos_completos(conn: Connection, stmt) -> List[str]:
+    """Recorridos completos de tablas en el plan de la consulta, p. ej. "Seq Scan en curso"."""
+    sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = conn.execute(text("EXPLAIN (FORMAT JSON) " + sql)).scalar()
+        conn.rollback()  # fin de la transacción: enable_seqscan vuelve a su valor
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return [r for r in map(_recorrido, _nodos(plan[0]["Plan"])) if r]
+    if conn.dialect.name == "sqlite":
+        # SCAN recorre la tabla (o un índice, "SCAN t USING INDEX ...") de punta a punta
+        filas = conn.execute(text("EXPLAIN QUERY PLAN " + sql)).all()
+        return [
+            ("Index Scan en " if " USING " in fila[3] else "Seq Scan en ") + fila[3].split()[1]
+            for fila in filas if fila[3].startswith("SCAN ")
+        ]
+    raise SystemExit(f"Motor no soportado: {conn.dialect.name}")
+
+
+def _aplica(indice: Index, dialecto: str) -> bool:
+    # Índices declarados con .ddl_if(dialect=...) (p. ej. el GIN de búsqueda)
+    condicion = getattr(indice, "_ddl_if", None)
+    return condicion is None or condicion.dialect in (None, dialecto)
+
+
+def indices_faltantes(conn: Connection) -> List[Index]:
+    inspector = inspect(conn)
+    tablas = set(inspector.get_table_names())
+    faltantes = []
+    for tabla in SQLModel.metadata.sorted_tables:
+        if tabla.name not in tablas:
+            continue
+        existentes = {i["name"] for i in inspector.get_indexes(tabla.name)}
+        faltantes += [
+            i for i in sorted(tabla.indexes, key=lambda i: i.name)
+            if i.name not in existentes and _aplica(i, conn.dialect.name)
+        ]
+    return faltantes
+
+
+def crear(indices: List[Index]) -> None:
+    # CREATE INDEX CONCURRENTLY no bloquea escrituras, pero no puede ir dentro de una transacción
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for indice in indices:
+            if conn.dialect.name == "postgresql":
+                indice.dialect_options["postgresql"]["concurrently"] = True
+            print(f"Creando {indice.name} ...")
+            indice.create(conn, checkfirst=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Auditoría de índices de las consultas frecuentes")
+    parser.add_argument("--crear", action="store_true", help="Crear los índices de los modelos que faltan")
+    args = parser.parse_args()
+
+    if args.crear:
+        with engine.connect() as conn:
+            faltantes = indices_faltantes(conn)
+        if faltantes:
+            crear(faltantes)
+            # Conexiones nuevas: SQLite no relee el esquema para EXPLAIN en una conexión abierta
+            engine.dispose()
+
+    with engine.connect() as conn:
+        faltantes = indices_faltantes(conn)
+        print("Índices de los modelos que faltan en la base:")
+        for indice in faltantes:
+            columnas = ", ".join(str(c) for c in indice.expressions)
+            print(f"  {indice.table.name}.{indice.name} ({columnas})")
+        if not faltantes:
+            print("  ninguno")
+
+        print("\nConsultas:")
+        con_recorridos = 0
+        for router, endpoint, consulta in CONSULTAS:
+            recorridos = recorridos_completos(conn, consulta())
+            estado = ", ".join(sorted(set(recorridos))) or "ok"
+            con_recorridos += bool(recorridos)
+            print(f"  [{router}] {endpoint}: {estado}")
+
+    return 1 if con_recorridos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
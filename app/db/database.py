@@ -1,4 +1,10 @@
-from sqlmodel import SQLModel, create_engine, Session 
+from contextlib import asynccontextmanager, contextmanager
+
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import create_engine, Session 
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models.users import User
 from app.models.profiles import Profile
 
@@ -6,9 +12,15 @@ from app.models.profesores import Profesor
 from app.models.cursos import Curso      
 from app.models.categorias import Categoria 
 from app.models.cursos_categorias import CursoCategoria
+from app.models.curso_busqueda import CursoBusqueda
+from app.models.refresh_tokens import RefreshToken
+from app.models.catalogo_version import CatalogoVersion
 
 # ⚠️ Importa la instancia de configuración segura
 from app.config import settings 
+from app.db.metricas import instrumentar
+from app.db.pool import AsyncPoolMedido, PoolMedido
+from app.db.replicas import Replicas
 
 # Convertimos el Dsn (Data Source Name) a string para usarlo con create_engine
 # Aunque SQLModel/SQLAlchemy generalmente aceptan el Dsn directamente, 
@@ -16,15 +28,116 @@ from app.config import settings
 
 database_url = str(settings.DATABASE_URL) 
 
-# Crear el engine
-engine = create_engine(database_url, echo=True)
+# Parámetros del pool comunes a los dos engines (ver Settings)
+pool_kwargs = dict(
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
+
+
+def async_url(url: str):
+    """
+    Adapta la URL de conexión al driver asyncpg.
+    asyncpg no entiende el parámetro sslmode de libpq: se pasa como connect_args["ssl"].
+    """
+    url = make_url(url)
+    connect_args = {}
+    sslmode = url.query.get("sslmode")
+    if sslmode:
+        url = url.difference_update_query(["sslmode"])
+        connect_args["ssl"] = sslmode
+    return url.set(drivername="postgresql+asyncpg"), connect_args
+
+
+def crear_engines(url: str):
+    """Engine sync y engine async (asyncpg) para la misma base."""
+    sync = create_engine(url, echo=settings.DB_ECHO, poolclass=PoolMedido, **pool_kwargs)
+    url_async, connect_args = async_url(url)
+    # Engine async para los endpoints `async def`: sus consultas no bloquean el event loop
+    asincrono = create_async_engine(
+        url_async, echo=settings.DB_ECHO, connect_args=connect_args, poolclass=AsyncPoolMedido, **pool_kwargs
+    )
+    instrumentar(sync, settings.SLOW_QUERY_MS)
+    instrumentar(asincrono.sync_engine, settings.SLOW_QUERY_MS)
+    return sync, asincrono
 
 
-def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
+# Crear los engines de la primaria
+engine, async_engine = crear_engines(database_url)
+
+# Réplicas de solo lectura (opcionales)
+_replicas = [crear_engines(u.strip()) for u in settings.DATABASE_REPLICA_URLS.split(",") if u.strip()]
+replicas = Replicas(
+    [r[0] for r in _replicas],
+    [r[1] for r in _replicas],
+    reintento=settings.DB_REPLICA_RETRY,
+)
+replicas.vigilar_escrituras(engine)
+replicas.vigilar_escrituras(async_engine.sync_engine)
+
+# expire_on_commit=False: después del commit los atributos se siguen leyendo
+# sin volver a la base (en async no hay lazy loading implícito)
+async_session_maker = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
 
 
 # Dependencia para obtener la sesión
 def get_session():
     with Session(engine) as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+# Dependencia async: usar en los endpoints `async def`
+async def get_async_session():
+    async with async_session_maker() as session:
+        yield session
+
+
+# --- Lecturas ---
+# Para endpoints que solo leen. Las escrituras (y los handlers que leen lo que
+# acaban de escribir) usan get_session / get_async_session, que van a la primaria.
+
+@contextmanager
+def read_session():
+    for i in replicas.candidatas():
+        session = Session(replicas.engines[i])
+        try:
+            session.connection()
+        except exc.DBAPIError:
+            session.close()
+            replicas.marcar_caida(i)
+            continue
+        with session:
+            yield session
+        return
+    with Session(engine) as session:
+        yield session
+
+
+@asynccontextmanager
+async def async_read_session():
+    for i in replicas.candidatas():
+        session = AsyncSession(replicas.async_engines[i], expire_on_commit=False)
+        try:
+            await session.connection()
+        except (exc.DBAPIError, OSError):
+            await session.close()
+            replicas.marcar_caida(i)
+            continue
+        async with session:
+            yield session
+        return
+    async with async_session_maker() as session:
+        yield session
+
+
+def get_read_session():
+    with read_session() as session:
+        yield session
+
+
+async def get_async_read_session():
+    async with async_read_session() as session:
+        yield session
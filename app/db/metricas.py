@@ -0,0 +1,178 @@
+# app/db/metricas.py
+
+# Métricas de las consultas SQL.
+# Cada sentencia se cronometra con los eventos before/after_cursor_execute del
+# engine y se agrupa por huella (el SQL normalizado, sin valores), con cantidad
+# de ejecuciones y tiempo total, medio, p95 y máximo. Las que superan
+# SLOW_QUERY_MS se registran en un log estructurado (una línea JSON) que se
+# escribe desde un hilo aparte (QueueHandler/QueueListener): el request no
+# espera a la salida estándar.
+# Si hay un request en curso (ver app.core.middleware) la sentencia también se
+# suma a sus contadores.
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import math
+import queue
+import re
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, List, Optional
+
+from sqlalchemy import Engine, event
+
+MAX_HUELLAS = 1000  # huellas distintas que se guardan; el resto se cuenta en OTRAS
+MUESTRAS = 500  # tiempos recientes por huella para calcular el p95
+OTRAS = "<otras>"
+
+_ESPACIOS = re.compile(r"\s+")
+_CADENAS = re.compile(r"'(?:[^']|'')*'")
+_NUMEROS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAMETROS = re.compile(r"%\(\w+\)s|%s|:\w+|\$\d+|\?|__\[POSTCOMPILE_\w+\]")
+_LISTAS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_FILAS = re.compile(r"(\(\?(?:, \?)*\))(?:, \1)+")
+
+
+def huella(sql: str) -> str:
+    """SQL sin valores ni parámetros: dos ejecuciones de la misma consulta dan la misma huella."""
+    sql = _ESPACIOS.sub(" ", sql).strip()
+    sql = _CADENAS.sub("?", sql)
+    sql = _PARAMETROS.sub("?", sql)
+    sql = _NUMEROS.sub("?", sql)
+    sql = _FILAS.sub(r"\1, ...", sql)  # INSERT ... VALUES (?, ?), (?, ?), ...
+    return _LISTAS.sub("(?, ...)", sql)  # IN (?, ?, ?)
+
+
+class Huella:
+    __slots__ = ("cantidad", "total", "maximo", "muestras")
+
+    def __init__(self):
+        self.cantidad = 0
+        self.total = 0.0
+        self.maximo = 0.0
+        self.muestras = deque(maxlen=MUESTRAS)
+
+    def stats(self) -> dict:
+        muestras = sorted(self.muestras)
+        p95 = muestras[math.ceil(len(muestras) * 0.95) - 1] if muestras else 0.0
+        return {
+            "calls": self.cantidad,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_ms": round(self.total / self.cantidad * 1000, 3),
+            "p95_ms": round(p95 * 1000, 3),
+            "max_ms": round(self.maximo * 1000, 3),
+        }
+
+
+class Metricas:
+    def __init__(self):
+        self._huellas: Dict[str, Huella] = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, clave: str, segundos: float) -> None:
+        with self._lock:
+            h = self._huellas.get(clave)
+            if h is None:
+                if len(self._huellas) >= MAX_HUELLAS:
+                    clave = OTRAS
+                h = self._huellas.setdefault(clave, Huella())
+            h.cantidad += 1
+            h.total += segundos
+            h.maximo = max(h.maximo, segundos)
+            h.muestras.append(segundos)
+
+    def top(self, n: int, orden: str = "total_ms") -> List[dict]:
+        with self._lock:
+            filas = [{"fingerprint": k, **h.stats()} for k, h in self._huellas.items()]
+        filas.sort(key=lambda f: f[orden], reverse=True)
+        return filas[:n]
+
+    def reiniciar(self) -> None:
+        with self._lock:
+            self._huellas.clear()
+
+
+metricas = Metricas()
+
+
+class ConsultasRequest:
+    """Sentencias ejecutadas durante un request."""
+
+    def __init__(self):
+        self.cantidad = 0
+        self.total = 0.0
+        self.por_huella: Counter = Counter()
+
+    def registrar(self, clave: str, segundos: float) -> None:
+        self.cantidad += 1
+        self.total += segundos
+        self.por_huella[clave] += 1
+
+
+consultas_request: contextvars.ContextVar[Optional[ConsultasRequest]] = contextvars.ContextVar(
+    "consultas_request", default=None
+)
+
+# --- Logs estructurados (no bloqueantes) ---
+
+_cola: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_listener = logging.handlers.QueueListener(_cola, logging.StreamHandler())
+_listener.start()
+atexit.register(_listener.stop)
+
+
+def logger_json(nombre: str) -> logging.Logger:
+    """Logger cuyos registros escribe el hilo del QueueListener."""
+    log = logging.getLogger(nombre)
+    if not log.handlers:
+        log.setLevel(logging.WARNING)
+        log.propagate = False
+        log.addHandler(logging.handlers.QueueHandler(_cola))
+    return log
+
+
+logger = logger_json("app.db.lentas")
+
+
+def _log_lenta(sql: str, clave: str, segundos: float) -> None:
+    logger.warning(json.dumps({
+        "event": "slow_query",
+        "ms": round(segundos * 1000, 3),
+        "fingerprint": clave,
+        "statement": sql[:2000],
+    }, ensure_ascii=False))
+
+
+# --- Eventos del engine ---
+
+def instrumentar(engine: Engine, umbral_ms: float) -> None:
+    """Cronometra cada sentencia del engine (para uno async, pasar async_engine.sync_engine)."""
+    umbral = umbral_ms / 1000
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("inicio_consultas", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _despues(conn, cursor, statement, parameters, context, executemany):
+        segundos = time.perf_counter() - conn.info["inicio_consultas"].pop()
+        clave = huella(statement)
+        metricas.registrar(clave, segundos)
+        actual = consultas_request.get()
+        if actual is not None:
+            actual.registrar(clave, segundos)
+        if segundos >= umbral:
+            _log_lenta(statement, clave, segundos)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(contexto):
+        # Falló cursor.execute: after_cursor_execute no se llama.
+        # En los errores de conexión el contexto no tiene cursor.
+        if getattr(contexto, "cursor", None) is not None and contexto.connection is not None:
+            inicios = contexto.connection.info.get("inicio_consultas")
+            if inicios:
+                inicios.pop()
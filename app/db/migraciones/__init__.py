@@ -0,0 +1,130 @@
+# app/db/migraciones/__init__.py
+
+# Migraciones versionadas del esquema.
+# Cada módulo mNNNN_*.py define VERSION, DESCRIPCION y aplicar(conn); la tabla
+# schema_version guarda las versiones aplicadas. Se ejecutan con
+#
+#   python -m app.db.migraciones            # aplica las pendientes
+#   python -m app.db.migraciones --estado   # versión de la base y versión esperada
+#
+# (en Heroku, como fase release del Procfile). Al arrancar, cada worker solo
+# compara la versión guardada con la esperada: una consulta, sin reflejar el
+# catálogo ni ejecutar DDL.
+#
+# Para agregar una migración: crear el módulo siguiente y sumarlo a MIGRACIONES.
+# Cada migración describe su cambio con DDL explícito, sin leer los modelos
+# (que siguen cambiando): m0001 es el esquema de partida congelado. Las bases
+# creadas antes de las migraciones pueden tener ya parte de los cambios, así
+# que conviene que sean idempotentes (IF NOT EXISTS, checkfirst, etc.).
+# Con TRANSACCIONAL = False la migración corre en autocommit (por ejemplo para
+# CREATE INDEX CONCURRENTLY, que no bloquea escrituras).
+
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import Column, DateTime, Engine, Integer, MetaData, String, Table, exc, select, text
+from sqlalchemy.engine import Connection
+
+from app.config import settings
+from app.db.migraciones import (
+    m0001_esquema_inicial,
+    m0002_indices_consultas,
+    m0003_documentos_busqueda,
+    m0004_version_token,
+    m0005_refresh_tokens,
+    m0006_version_catalogo,
+)
+
+MIGRACIONES = [
+    m0001_esquema_inicial,
+    m0002_indices_consultas,
+    m0003_documentos_busqueda,
+    m0004_version_token,
+    m0005_refresh_tokens,
+    m0006_version_catalogo,
+]
+VERSION = MIGRACIONES[-1].VERSION
+
+# Fuera de SQLModel.metadata: no la crea ni la toca create_all
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("descripcion", String, nullable=False),
+    Column("aplicada_en", DateTime, nullable=False),
+)
+
+# Clave del advisory lock de PostgreSQL: dos procesos no migran a la vez
+_CLAVE_LOCK = 7245001
+
+
+class EsquemaDesactualizado(RuntimeError):
+    pass
+
+
+def version_actual(conn: Connection) -> int:
+    try:
+        version = conn.execute(select(schema_version.c.version).order_by(
+            schema_version.c.version.desc()).limit(1)).scalar()
+    except (exc.ProgrammingError, exc.OperationalError):
+        conn.rollback()  # la tabla todavía no existe
+        return 0
+    return version or 0
+
+
+def migrar(engine: Engine) -> List[int]:
+    """Aplica las migraciones pendientes y devuelve sus versiones."""
+    aplicadas = []
+    with engine.connect() as conn:
+        es_postgres = conn.dialect.name == "postgresql"
+        if es_postgres:
+            conn.execute(text("SELECT pg_advisory_lock(:clave)"), {"clave": _CLAVE_LOCK})
+        schema_version.create(conn, checkfirst=True)
+        conn.commit()
+        try:
+            actual = version_actual(conn)
+            for migracion in MIGRACIONES:
+                if migracion.VERSION <= actual:
+                    continue
+                print(f"Aplicando migración {migracion.VERSION}: {migracion.DESCRIPCION}")
+                if getattr(migracion, "TRANSACCIONAL", True):
+                    migracion.aplicar(conn)
+                else:
+                    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as autocommit:
+                        migracion.aplicar(autocommit)
+                conn.execute(schema_version.insert().values(
+                    version=migracion.VERSION,
+                    descripcion=migracion.DESCRIPCION,
+                    aplicada_en=datetime.utcnow(),
+                ))
+                conn.commit()
+                aplicadas.append(migracion.VERSION)
+        finally:
+            conn.rollback()
+            if es_postgres:
+                conn.execute(text("SELECT pg_advisory_unlock(:clave)"), {"clave": _CLAVE_LOCK})
+                conn.commit()
+    return aplicadas
+
+
+def verificar(engine: Engine) -> None:
+    """
+    Chequeo de arranque: compara la versión guardada con la esperada.
+    Con DB_AUTO_MIGRATE aplica las pendientes; si no, falla para no servir
+    tráfico con un esquema viejo.
+    """
+    with engine.connect() as conn:
+        actual = version_actual(conn)
+    if actual == VERSION:
+        return
+    if actual > VERSION:
+        # Despliegue en curso: la base ya tiene migraciones de una versión más nueva del código
+        print(f"⚠️ Esquema en versión {actual}, este código espera la {VERSION}")
+        return
+    if settings.DB_AUTO_MIGRATE:
+        migrar(engine)
+        return
+    raise EsquemaDesactualizado(
+        f"Esquema en versión {actual}, se esperaba la {VERSION}: "
+        "ejecutar `python -m app.db.migraciones`"
+    )
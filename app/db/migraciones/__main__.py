@@ -0,0 +1,27 @@
+# python -m app.db.migraciones
+
+import argparse
+
+from app.db.database import engine
+from app.db.migraciones import VERSION, migrar, version_actual
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Migraciones del esquema de la base")
+    parser.add_argument("--estado", action="store_true", help="Solo mostrar la versión actual y la esperada")
+    args = parser.parse_args()
+
+    if args.estado:
+        with engine.connect() as conn:
+            print(f"Versión de la base: {version_actual(conn)} / esperada: {VERSION}")
+        return
+
+    aplicadas = migrar(engine)
+    if aplicadas:
+        print(f"Migraciones aplicadas: {aplicadas}")
+    else:
+        print(f"El esquema ya está en la versión {VERSION}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# Esquema de partida: las tablas tal como las creaba create_all al arrancar,
+# antes de las migraciones. Está congelado acá (no se toma de los modelos): los
+# cambios posteriores del modelo van en migraciones nuevas. En bases creadas
+# con create_all solo agrega las tablas que falten, por ejemplo curso_busqueda.
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    literal_column,
+    text,
+)
+from sqlalchemy.dialects.postgresql import to_tsvector
+from sqlalchemy.engine import Connection
+
+VERSION = 1
+DESCRIPCION = "Esquema inicial"
+
+metadata = MetaData()
+
+Table(
+    "user",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("username", String, nullable=False),
+    Column("email", String, nullable=False),
+    Column("password", String, nullable=False),
+    Column("role", String),
+    Index("ix_user_username", "username", unique=True),
+    Index("ix_user_email", "email", unique=True),
+)
+
+Table(
+    "profile",
+    metadata,
+    Column("nombre", String),
+    Column("apellido", String),
+    Column("imagen_url", String),
+    Column("direccion", String),
+    Column("departamento", String),
+    Column("provincia", String),
+    Column("bio", String),
+    Column("is_active", Boolean, nullable=False),
+    Column("imagen_id", String),
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, ForeignKey("user.id"), nullable=False),
+)
+
+Table(
+    "profesor",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("profesion", String(100), nullable=False),
+    Column("imagen_url", String),
+    Column("imagen_id", String),
+    Index("ix_profesor_name", "name"),
+)
+
+Table(
+    "categoria",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("descripcion", String(100), nullable=False),
+    Column("imagen_url", String),
+    Column("imagen_id", String),
+    Index("ix_categoria_name", "name"),
+)
+
+Table(
+    "curso",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("titulo", String(100), nullable=False),
+    Column("descripcion", String(500), nullable=False),
+    Column("duracion", Integer, nullable=False),
+    Column("precio", Float, nullable=False),
+    Column("imagen_url", String),
+    Column("nivel", String, nullable=False),
+    Column("destacado", Boolean, nullable=False),
+    Column("profesor_id", Integer, ForeignKey("profesor.id"), nullable=False),
+    Column("imagen_id", String),
+)
+
+Table(
+    "cursocategoria",
+    metadata,
+    Column("curso_id", Integer, ForeignKey("curso.id"), primary_key=True),
+    Column("categoria_id", Integer, ForeignKey("categoria.id"), primary_key=True),
+)
+
+Table(
+    "curso_busqueda",
+    metadata,
+    Column("curso_id", Integer, ForeignKey("curso.id"), primary_key=True),
+    Column("documento", String, nullable=False),
+    Index(
+        "ix_curso_busqueda_documento_tsv",
+        to_tsvector(literal_column("'spanish'"), text("documento")),
+        postgresql_using="gin",
+    ).ddl_if(dialect="postgresql"),
+)
+
+Table(
+    "user_payments",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, ForeignKey("user.id")),
+    Column("curso_id", Integer, ForeignKey("curso.id")),
+    Column("payment_id", String, nullable=False),
+    Column("external_reference", String),
+    Column("status", String, nullable=False),
+    Column("amount", Float, nullable=False),
+    Column("payment_method", String),
+    Column("merchant_order_id", String),
+    Column("raw_payload", String),
+    Column("created_at", DateTime, nullable=False),
+    Column("updated_at", DateTime, nullable=False),
+    Index("ix_user_payments_user_id", "user_id"),
+    Index("ix_user_payments_curso_id", "curso_id"),
+    Index("ix_user_payments_payment_id", "payment_id", unique=True),
+    Index("ix_user_payments_external_reference", "external_reference"),
+    Index("ix_user_payments_merchant_order_id", "merchant_order_id"),
+)
+
+
+def aplicar(conn: Connection) -> None:
+    metadata.create_all(conn)
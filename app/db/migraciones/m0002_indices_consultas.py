@@ -0,0 +1,46 @@
+# Índices de las consultas frecuentes (ver app.db.auditoria_indices).
+# create_all no agrega índices a tablas existentes; en PostgreSQL se crean
+# CONCURRENTLY para no bloquear escrituras. Si un CREATE INDEX CONCURRENTLY
+# anterior falló o se interrumpió, el índice queda INVALID (existe pero el
+# planner no lo usa) e IF NOT EXISTS lo saltearía: se borra y se vuelve a crear.
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+VERSION = 2
+DESCRIPCION = "Índices de las consultas frecuentes"
+TRANSACCIONAL = False
+
+INDICES = [
+    ("ix_curso_profesor_id", "curso", "profesor_id"),
+    ("ix_curso_destacado", "curso", "destacado"),
+    ("ix_cursocategoria_categoria_id", "cursocategoria", "categoria_id"),
+    ("ix_profile_user_id", "profile", "user_id"),
+    ("ix_user_payments_user_id_status_curso_id", "user_payments", "user_id, status, curso_id"),
+]
+
+
+def indice_invalido(conn: Connection, nombre: str) -> bool:
+    """True si el índice existe en PostgreSQL pero quedó marcado como inválido."""
+    if conn.dialect.name != "postgresql":
+        return False
+    valido = conn.execute(
+        text(
+            "SELECT i.indisvalid FROM pg_index i"
+            " JOIN pg_class c ON c.oid = i.indexrelid"
+            " WHERE c.relname = :nombre AND c.relnamespace = current_schema()::regnamespace"
+        ),
+        {"nombre": nombre},
+    ).scalar()
+    return valido is False
+
+
+def aplicar(conn: Connection) -> None:
+    concurrente = "CONCURRENTLY " if conn.dialect.name == "postgresql" else ""
+    for nombre, tabla, columnas in INDICES:
+        if indice_invalido(conn, nombre):
+            print(f"  {nombre} quedó inválido: se vuelve a crear")
+            conn.execute(text(f"DROP INDEX {concurrente}IF EXISTS {nombre}"))
+        conn.execute(text(f"CREATE INDEX {concurrente}IF NOT EXISTS {nombre} ON {tabla} ({columnas})"))
+    # Lo cubre el índice compuesto (user_id, status, curso_id)
+    conn.execute(text(f"DROP INDEX {concurrente}IF EXISTS ix_user_payments_user_id"))
@@ -0,0 +1,63 @@
+# Documento de búsqueda de los cursos creados antes de curso_busqueda
+# (antes se completaba en cada arranque). Arma el mismo texto que
+# busqueda.documento (título, descripción, categorías y profesor), con las
+# columnas de esta versión: no usa los modelos ni el servicio de búsqueda.
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, insert, select
+from sqlalchemy.engine import Connection
+
+VERSION = 3
+DESCRIPCION = "Documentos de búsqueda de los cursos existentes"
+
+metadata = MetaData()
+
+curso = Table(
+    "curso",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("titulo", String),
+    Column("descripcion", String),
+    Column("profesor_id", Integer),
+)
+profesor = Table("profesor", metadata, Column("id", Integer, primary_key=True), Column("name", String))
+categoria = Table("categoria", metadata, Column("id", Integer, primary_key=True), Column("name", String))
+cursocategoria = Table(
+    "cursocategoria",
+    metadata,
+    Column("curso_id", Integer, primary_key=True),
+    Column("categoria_id", Integer, primary_key=True),
+)
+curso_busqueda = Table(
+    "curso_busqueda",
+    metadata,
+    Column("curso_id", Integer, primary_key=True),
+    Column("documento", String),
+)
+
+
+def aplicar(conn: Connection) -> None:
+    faltantes = curso.c.id.not_in(select(curso_busqueda.c.curso_id))
+    cursos = conn.execute(
+        select(curso.c.id, curso.c.titulo, curso.c.descripcion, profesor.c.name)
+        .outerjoin(profesor, profesor.c.id == curso.c.profesor_id)
+        .where(faltantes)
+    ).all()
+
+    categorias = {}
+    for curso_id, nombre in conn.execute(
+        select(cursocategoria.c.curso_id, categoria.c.name)
+        .join(categoria, categoria.c.id == cursocategoria.c.categoria_id)
+        .where(cursocategoria.c.curso_id.in_(select(curso.c.id).where(faltantes)))
+    ):
+        categorias.setdefault(curso_id, []).append(nombre)
+
+    documentos = [
+        {
+            "curso_id": curso_id,
+            "documento": " ".join(p for p in [titulo, descripcion, *categorias.get(curso_id, ()), nombre] if p),
+        }
+        for curso_id, titulo, descripcion, nombre in cursos
+    ]
+    if documentos:
+        conn.execute(insert(curso_busqueda), documentos)
+    print(f"  {len(documentos)} cursos indexados")
@@ -0,0 +1,15 @@
+# Columna user.token_version: versión de los tokens del usuario (claim "ver").
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+VERSION = 4
+DESCRIPCION = "Versión de los tokens de cada usuario"
+
+
+def aplicar(conn: Connection) -> None:
+    columnas = {c["name"] for c in inspect(conn).get_columns("user")}
+    if "token_version" in columnas:
+        return
+    tabla = conn.dialect.identifier_preparer.quote("user")  # "user" es palabra reservada en PostgreSQL
+    conn.execute(text(f"ALTER TABLE {tabla} ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0"))
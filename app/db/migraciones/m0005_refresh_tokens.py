@@ -0,0 +1,31 @@
+# Tabla refresh_tokens (ver app.models.refresh_tokens), con su definición de
+# esta versión: no se toma del modelo.
+
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, MetaData, String, Table
+from sqlalchemy.engine import Connection
+
+VERSION = 5
+DESCRIPCION = "Refresh tokens"
+
+metadata = MetaData()
+
+# Solo para resolver la clave foránea; no se crea
+Table("user", metadata, Column("id", Integer, primary_key=True))
+
+refresh_tokens = Table(
+    "refresh_tokens",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False),
+    Column("token_hash", String, nullable=False, unique=True),
+    Column("familia", String, nullable=False),
+    Column("expira", DateTime, nullable=False),
+    Column("revocado", Boolean, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Index("ix_refresh_tokens_user_id", "user_id"),
+    Index("ix_refresh_tokens_familia", "familia"),
+)
+
+
+def aplicar(conn: Connection) -> None:
+    refresh_tokens.create(conn, checkfirst=True)
@@ -0,0 +1,22 @@
+# Tabla catalog_version con su única fila (ver app.models.catalogo_version).
+
+from sqlalchemy import Column, Integer, MetaData, Table, insert, select
+from sqlalchemy.engine import Connection
+
+VERSION = 6
+DESCRIPCION = "Versión compartida del catálogo"
+
+metadata = MetaData()
+
+catalog_version = Table(
+    "catalog_version",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("version", Integer, nullable=False),
+)
+
+
+def aplicar(conn: Connection) -> None:
+    catalog_version.create(conn, checkfirst=True)
+    if conn.execute(select(catalog_version.c.id).where(catalog_version.c.id == 1)).first() is None:
+        conn.execute(insert(catalog_version).values(id=1, version=0))
@@ -0,0 +1,96 @@
+# app/db/pool.py
+
+# Pools de conexiones que además registran cuánto se espera para obtener una
+# conexión. Con estos datos y el estado del pool (en uso, libres, overflow) se
+# dimensiona pool_size/max_overflow por worker frente al límite de conexiones
+# de la base.
+
+import math
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+
+class Esperas:
+    def __init__(self, muestras: int = 1000):
+        self._muestras = deque(maxlen=muestras)
+        self._lock = threading.Lock()
+        self.cantidad = 0
+        self.total = 0.0
+        self.maxima = 0.0
+        self.timeouts = 0
+
+    def registrar(self, segundos: float) -> None:
+        with self._lock:
+            self.cantidad += 1
+            self.total += segundos
+            self.maxima = max(self.maxima, segundos)
+            self._muestras.append(segundos)
+
+    def timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            muestras = sorted(self._muestras)
+            p95 = muestras[math.ceil(len(muestras) * 0.95) - 1] if muestras else 0.0
+            return {
+                "checkouts": self.cantidad,
+                "mean_ms": round(self.total / self.cantidad * 1000, 3) if self.cantidad else 0.0,
+                "p95_ms": round(p95 * 1000, 3),
+                "max_ms": round(self.maxima * 1000, 3),
+                "timeouts": self.timeouts,
+            }
+
+
+class _Medido:
+    esperas: Esperas
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.esperas.timeout()
+            raise
+        finally:
+            self.esperas.registrar(time.perf_counter() - inicio)
+
+    def recreate(self):
+        # engine.dispose() reemplaza el pool: se conservan las estadísticas
+        nuevo = super().recreate()
+        nuevo.esperas = self.esperas
+        return nuevo
+
+
+class PoolMedido(_Medido, QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.esperas = Esperas()
+
+
+class AsyncPoolMedido(_Medido, AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.esperas = Esperas()
+
+
+def estado(pool: Pool) -> dict:
+    """Conexiones en uso, libres y en overflow, más los tiempos de espera del pool."""
+    datos = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        datos.update({
+            "pool_size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+        })
+    if isinstance(pool, _Medido):
+        datos["wait"] = pool.esperas.stats()
+    return datos
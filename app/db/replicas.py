@@ -0,0 +1,89 @@
+# app/db/replicas.py
+
+# Reparto de lecturas entre réplicas de la base.
+# Se elige la réplica por round-robin; si una no responde se la marca caída
+# durante un tiempo y se prueba la siguiente, y si no queda ninguna se lee de
+# la primaria. Después de que un cliente escribe, sus lecturas van a la primaria
+# durante unos segundos, para que no lea datos que la réplica todavía no
+# recibió: el request que hizo commit marca la respuesta (cookie o header, ver
+# LecturasPrimariaMiddleware) y los requests siguientes de ese cliente, en
+# cualquier worker, traen la marca. Los demás clientes siguen leyendo de las
+# réplicas.
+
+import contextvars
+import itertools
+import threading
+import time
+from typing import List, Optional
+
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.db.pool import estado
+
+
+class LecturasRequest:
+    """Si las lecturas del request tienen que ir a la primaria."""
+
+    def __init__(self, primaria: bool = False):
+        self.primaria = primaria  # el cliente escribió hace menos de la ventana
+        self.escribio = False  # hubo un commit durante este request
+
+
+lecturas_request: contextvars.ContextVar[Optional[LecturasRequest]] = contextvars.ContextVar(
+    "lecturas_request", default=None
+)
+
+
+class Replicas:
+    def __init__(
+        self,
+        engines: List[Engine],
+        async_engines: List[AsyncEngine],
+        reintento: float,
+    ):
+        self.engines = engines
+        self.async_engines = async_engines
+        self.reintento = reintento
+        self._caida_hasta = [0.0] * len(engines)
+        self._turno = itertools.count()
+        self._lock = threading.Lock()
+
+    def vigilar_escrituras(self, primaria: Engine) -> None:
+        event.listen(primaria, "commit", self._registrar_escritura)
+
+    def _registrar_escritura(self, conn) -> None:
+        # El commit corre en el threadpool o en el event loop, dentro del
+        # contexto del request: se marca el objeto compartido, no la variable
+        actual = lecturas_request.get()
+        if actual is not None:
+            actual.escribio = True
+
+    def candidatas(self) -> List[int]:
+        """Índices de las réplicas a probar, en orden; vacío si hay que leer de la primaria."""
+        if not self.engines:
+            return []
+        actual = lecturas_request.get()
+        if actual is not None and (actual.primaria or actual.escribio):
+            return []
+        ahora = time.monotonic()
+        n = len(self.engines)
+        inicio = next(self._turno) % n
+        orden = [(inicio + i) % n for i in range(n)]
+        return [i for i in orden if self._caida_hasta[i] <= ahora]
+
+    def marcar_caida(self, indice: int) -> None:
+        with self._lock:
+            self._caida_hasta[indice] = time.monotonic() + self.reintento
+
+    def estado(self) -> List[dict]:
+        ahora = time.monotonic()
+        return [
+            {
+                "url": engine.url.render_as_string(hide_password=True),
+                "down": self._caida_hasta[i] > ahora,
+                "sync": estado(engine.pool),
+                "async": estado(self.async_engines[i].sync_engine.pool),
+            }
+            for i, engine in enumerate(self.engines)
+        ]
@@ -1,11 +1,15 @@
 from fastapi import FastAPI
-from app.db.database import create_db_and_tables
+from app.db.database import engine, async_engine, replicas
+from app.db import migraciones
+from app.core.security import cerrar_pool
+from app.services import relacionados
 from app.router import users, auth, private, profiles
-from app.router import profesores, categorias, cursos, user_payments
+from app.router import profesores, categorias, cursos, user_payments, admin
 
 from app.payments.routes import router as mp_router
 
 from fastapi.middleware.cors import CORSMiddleware
+from app.core.middleware import ConsultasPorRequestMiddleware, LecturasPrimariaMiddleware
 
 from .config import settings
 
@@ -22,11 +26,33 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing", LecturasPrimariaMiddleware.HEADER],
 )
 
+# Cantidad y tiempo de las consultas SQL de cada request (header Server-Timing)
+app.add_middleware(
+    ConsultasPorRequestMiddleware,
+    presupuesto=settings.QUERY_BUDGET,
+    repeticiones=settings.N1_THRESHOLD,
+)
+
+# Lecturas de la primaria para el cliente que acaba de escribir (réplicas)
+app.add_middleware(LecturasPrimariaMiddleware, ventana=settings.DB_REPLICA_STICKY)
+
 @app.on_event("startup")
 def on_startup():
-    create_db_and_tables()
+    # Solo compara la versión del esquema; las migraciones corren aparte
+    # (python -m app.db.migraciones, fase release del Procfile)
+    migraciones.verificar(engine)
+    relacionados.iniciar()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await async_engine.dispose()
+    for replica in replicas.async_engines:
+        await replica.dispose()
+    cerrar_pool()
+    relacionados.detener()
 
 @app.get("/") 
 async def root():
@@ -48,4 +74,5 @@ app.include_router(cursos.router, prefix="/cursos", tags=["cursos"])
 
 app.include_router(mp_router)
 app.include_router(user_payments.router)
+app.include_router(admin.router)
 
@@ -0,0 +1,12 @@
+from sqlmodel import SQLModel, Field
+
+
+# 📌 Versión del catálogo (cursos, categorías y profesores), compartida por
+# todos los workers. Una sola fila (id = 1) que cada escritura del catálogo
+# incrementa en su misma transacción (ver app.services.catalogo).
+
+class CatalogoVersion(SQLModel, table=True):
+    __tablename__ = "catalog_version"
+
+    id: int = Field(default=1, primary_key=True)
+    version: int = Field(default=0, nullable=False)
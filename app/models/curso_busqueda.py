@@ -0,0 +1,22 @@
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Index, literal_column, text
+# La función del dialecto: func.to_tsvector no compila si se construye antes de
+# que se cargue sqlalchemy.dialects.postgresql (los modelos se importan primero)
+from sqlalchemy.dialects.postgresql import to_tsvector
+
+
+# 📌 Documento de búsqueda de cada curso (título, descripción, categorías y profesor)
+# En PostgreSQL se indexa con un índice GIN sobre to_tsvector('spanish', documento).
+
+class CursoBusqueda(SQLModel, table=True):
+    __tablename__ = "curso_busqueda"
+    __table_args__ = (
+        Index(
+            "ix_curso_busqueda_documento_tsv",
+            to_tsvector(literal_column("'spanish'"), text("documento")),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
+
+    curso_id: int = Field(foreign_key="curso.id", primary_key=True)
+    documento: str = Field(nullable=False)
@@ -15,9 +15,9 @@ class Curso(SQLModel, table=True):
     precio: float = Field(default=0.0, nullable=False)  # Precio del curso
     imagen_url: Optional[str] = Field(default=None, nullable=True)  # URL de la imagen del curso
     nivel: str = Field(default="Básico", nullable=False)  # Nivel del curso
-    destacado: bool = Field(default=False, nullable=False)  # Indica si el curso es destacado
+    destacado: bool = Field(default=False, nullable=False, index=True)  # Indica si el curso es destacado
     
-    profesor_id: int = Field(foreign_key="profesor.id")  # Clave foránea a Profesor
+    profesor_id: int = Field(foreign_key="profesor.id", index=True)  # Clave foránea a Profesor
 
     # Identificador interno (public_id) en Cloudinary
     imagen_id: Optional[str] = None
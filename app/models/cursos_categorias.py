@@ -4,4 +4,5 @@ from sqlmodel import SQLModel, Field
 
 class CursoCategoria(SQLModel, table=True):
     curso_id: int = Field(foreign_key="curso.id", primary_key=True)
-    categoria_id: int = Field(foreign_key="categoria.id", primary_key=True)
\ No newline at end of file
+    # La PK empieza por curso_id: las búsquedas por categoría necesitan su propio índice
+    categoria_id: int = Field(foreign_key="categoria.id", primary_key=True, index=True)
\ No newline at end of file
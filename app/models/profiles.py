@@ -18,7 +18,7 @@ class ProfileBase(SQLModel):
     
 class Profile(ProfileBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: int = Field(default=None, foreign_key="user.id")
+    user_id: int = Field(default=None, foreign_key="user.id", index=True)
 
     # No es necsaria la importación de User
     user: Optional["User"] = Relationship(back_populates="profile")
\ No newline at end of file
@@ -0,0 +1,22 @@
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime
+
+
+# Refresh tokens emitidos. Solo se guarda el sha256 del token: quien lea la
+# tabla no puede usarlos. Cada uso lo reemplaza por uno nuevo de la misma
+# familia (el login la inicia); si se presenta uno ya usado, se revoca toda la
+# familia, porque alguien más tiene una copia.
+class RefreshToken(SQLModel, table=True):
+    __tablename__ = "refresh_tokens"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="user.id", ondelete="CASCADE", index=True, nullable=False)
+
+    token_hash: str = Field(nullable=False, sa_column_kwargs={"unique": True})  # sha256 hex
+    familia: str = Field(index=True, nullable=False)
+
+    expira: datetime = Field(nullable=False)
+    revocado: bool = Field(default=False, nullable=False)  # usado (rotado) o revocado
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
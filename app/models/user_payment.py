@@ -1,14 +1,20 @@
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
 from typing import Optional
 from datetime import datetime
 
 class UserPayment(SQLModel, table=True):
     __tablename__ = "user_payments"
+    __table_args__ = (
+        # Filtros de list_user_payments (user_id, user_id+status, user_id+status+curso_id).
+        # Cubre también las búsquedas solo por user_id.
+        Index("ix_user_payments_user_id_status_curso_id", "user_id", "status", "curso_id"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
 
     # Relación con el usuario (nullable para permitir pagos sin metadata)
-    user_id: Optional[int] = Field(default=None, foreign_key="user.id", index=True)
+    user_id: Optional[int] = Field(default=None, foreign_key="user.id")
 
     # Relación con el curso (nullable para permitir pagos sin metadata)
     curso_id: Optional[int] = Field(default=None, foreign_key="curso.id", index=True)
@@ -9,6 +9,8 @@ class User(SQLModel, table=True):
     email: str = Field(index=True, unique=True, nullable=False)
     password: str = Field(nullable=False)
     role: Optional[str] = Field(default="user")  # valores: "user", "admin", "superadmin"
+    # Se incrementa al cambiar el rol o la contraseña: invalida los tokens emitidos antes (claim "ver")
+    token_version: int = Field(default=0, nullable=False, sa_column_kwargs={"server_default": "0"})
 
     # Activamos la relación con Profile
     # No es necesario realizar la importación de Profile
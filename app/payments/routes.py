@@ -2,6 +2,7 @@ import mercadopago
 from fastapi import FastAPI, HTTPException, APIRouter, Depends, Request
 from pydantic import BaseModel
 
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import RedirectResponse, JSONResponse
 import json
 import time
@@ -10,10 +11,12 @@ from app.config import settings
 import os
 import httpx
 
-from app.db.database import get_session
-from app.core.security import get_password_hash
+from app.db.database import get_session, get_async_session
+from app.core import limites
+from app.core.security import hash_password
 from app.models.users import User
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.models.user_payment import UserPayment
 from app.schemas.user_payment import UserPaymentCreate, UserPaymentRead
@@ -112,40 +115,42 @@ def create_preference(data: PaymentRequest):
 # Ahora estas rutas hacen el trabajo sucio de guardar en la BD
 
 @router.get("/success")
-async def pago_exitoso(request: Request, session: Session = Depends(get_session)):
+async def pago_exitoso(request: Request, session: AsyncSession = Depends(get_async_session)):
     # Capturamos datos y guardamos como 'approved'
-    process_payment_return(request, session, status_override="approved")
+    await process_payment_return(request, session, status_override="approved")
     return RedirectResponse(url=f"{URL_FRONT}/success")
 
 @router.get("/failure")
-async def pago_fallido(request: Request, session: Session = Depends(get_session)):
-    process_payment_return(request, session, status_override="rejected")
+async def pago_fallido(request: Request, session: AsyncSession = Depends(get_async_session)):
+    await process_payment_return(request, session, status_override="rejected")
     return RedirectResponse(url=f"{URL_FRONT}/failure")
 
 @router.get("/pending")
-async def pago_pendiente(request: Request, session: Session = Depends(get_session)):
-    process_payment_return(request, session, status_override="pending")
+async def pago_pendiente(request: Request, session: AsyncSession = Depends(get_async_session)):
+    await process_payment_return(request, session, status_override="pending")
     return RedirectResponse(url=f"{URL_FRONT}/pending")
 
 
 @router.post("/checkout")
-def register_and_checkout(data: PaymentRequest, session: Session = Depends(get_session)):
-    stmt = select(User).where((User.email == data.email) | (User.username == data.username))
-    existing_user = session.exec(stmt).first()
-    if existing_user:
-        raise HTTPException(status_code=400, detail="El usuario ya existe")
-
-    if not data.password:
-        raise HTTPException(status_code=400, detail="Se requiere password para registrar usuario")
-
-    hashed_pw = get_password_hash(data.password)
-    db_user = User(username=data.username, email=data.email, password=hashed_pw)
-    session.add(db_user)
-    session.commit()
-    session.refresh(db_user)
+async def register_and_checkout(data: PaymentRequest, request: Request, session: AsyncSession = Depends(get_async_session)):
+    async with limites.admitir(request, "checkout", cuenta=data.email):
+        stmt = select(User).where((User.email == data.email) | (User.username == data.username))
+        existing_user = (await session.exec(stmt)).first()
+        if existing_user:
+            raise HTTPException(status_code=400, detail="El usuario ya existe")
+
+        if not data.password:
+            raise HTTPException(status_code=400, detail="Se requiere password para registrar usuario")
+
+        hashed_pw = await hash_password(data.password)
+        db_user = User(username=data.username, email=data.email, password=hashed_pw)
+        session.add(db_user)
+        await session.commit()
+        await session.refresh(db_user)
 
     data.user_id = db_user.id
-    return create_preference(data)
+    # create_preference llama al SDK de Mercado Pago (bloqueante)
+    return await run_in_threadpool(create_preference, data)
 
 
 @router.post("/webhook")
@@ -181,7 +186,7 @@ async def handle_webhook(request: Request):
     return JSONResponse(content={"status": "OK"}, status_code=200)
 
 # --- LÓGICA DE GUARDADO (Helper) ---
-def process_payment_return(request: Request, session: Session, status_override: str = None):
+async def process_payment_return(request: Request, session: AsyncSession, status_override: str = None):
     """
     Captura los parámetros de la URL de redirección (Query Params)
     y guarda/actualiza el pago en la BD sin consultar a la API de MP.
@@ -218,14 +223,14 @@ def process_payment_return(request: Request, session: Session, status_override:
     try:
         # Verificar si ya existe
         stmt = select(UserPayment).where(UserPayment.payment_id == str(payment_id))
-        existing_payment = session.exec(stmt).first()
+        existing_payment = (await session.exec(stmt)).first()
 
         if existing_payment:
             print(f"🔄 Actualizando pago {payment_id} a {status}")
             existing_payment.status = status
             existing_payment.updated_at = datetime.utcnow()
             session.add(existing_payment)
-            session.commit()
+            await session.commit()
         else:
             print(f"✨ Creando nuevo pago {payment_id} como {status}")
             # NOTA: La URL de retorno NO trae el 'amount'.
@@ -244,7 +249,7 @@ def process_payment_return(request: Request, session: Session, status_override:
                 updated_at=datetime.utcnow()
             )
             session.add(new_payment)
-            session.commit()
+            await session.commit()
             
             # Lógica de activación de curso (si aplica)
             if status == "approved":
@@ -256,9 +261,9 @@ def process_payment_return(request: Request, session: Session, status_override:
 
 
 @router.post("/payments", response_model=UserPaymentRead)
-async def create_payment(payment: UserPaymentCreate, session: Session = Depends(get_session)):
+async def create_payment(payment: UserPaymentCreate, session: AsyncSession = Depends(get_async_session)):
     new_payment = UserPayment.from_orm(payment)
     session.add(new_payment)
-    session.commit()
-    session.refresh(new_payment)
+    await session.commit()
+    await session.refresh(new_payment)
     return new_payment
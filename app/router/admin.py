@@ -0,0 +1,56 @@
+from enum import Enum
+
+from fastapi import APIRouter, Depends, Query
+
+from app.auth.auth import require_admin, usuarios_cache
+from app.db.database import async_engine, engine, replicas
+from app.db.metricas import metricas
+from app.db.pool import estado
+from app.services import catalogo
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+class OrdenConsultasEnum(str, Enum):
+    total_ms = "total_ms"
+    mean_ms = "mean_ms"
+    p95_ms = "p95_ms"
+    calls = "calls"
+
+
+# 📌 Estadísticas de la caché del catálogo (para dimensionarla)
+@router.get("/cache/catalogo")
+def estadisticas_cache_catalogo(user = Depends(require_admin)):
+    return catalogo.cache.stats()
+
+
+# 📌 Estadísticas de la caché de usuarios autenticados
+@router.get("/cache/usuarios")
+def estadisticas_cache_usuarios(user = Depends(require_admin)):
+    return usuarios_cache.stats()
+
+
+# 📌 Estado de los pools de conexiones de este worker
+@router.get("/db/pool")
+def estado_pool(user = Depends(require_admin)):
+    return {
+        "sync": estado(engine.pool),
+        "async": estado(async_engine.sync_engine.pool),
+        "replicas": replicas.estado(),
+    }
+
+
+# 📌 Consultas SQL más costosas de este worker, agrupadas por huella
+@router.get("/db/queries")
+def consultas_costosas(
+    top: int = Query(20, ge=1, le=200),
+    orden: OrdenConsultasEnum = Query(OrdenConsultasEnum.total_ms),
+    user = Depends(require_admin)
+):
+    return metricas.top(top, orden.value)
+
+
+# 📌 Reiniciar las métricas (por ejemplo, antes de medir un cambio)
+@router.delete("/db/queries", status_code=204)
+def reiniciar_consultas(user = Depends(require_admin)):
+    metricas.reiniciar()
@@ -1,13 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
 
-from sqlmodel import Session, select
-from app.db.database import get_session
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+
+from sqlmodel import delete, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.db.database import get_async_session
+from app.models.refresh_tokens import RefreshToken
 from app.models.users import User
-from app.core.security import verify_password
+from app.core import limites
+from app.core.security import verify_and_update
 
-from app.schemas.token import  LoginData
+from app.schemas.token import  LoginData, RefreshData
 
-from app.auth.auth import create_access_token
+from app.auth.auth import credenciales_invalidas, hash_refresh_token, nuevo_refresh_token, token_usuario
 
 from sqlalchemy.orm import selectinload
 
@@ -16,23 +21,37 @@ router = APIRouter()
 
 
 @router.post("/login")
-def login(data: LoginData, session: Session = Depends(get_session)):
-    statement = (
-        select(User)
-        .where(User.email == data.email)
-        .options(selectinload(User.profile))  # Cargar perfil si es necesario
+async def login(data: LoginData, request: Request, session: AsyncSession = Depends(get_async_session)):
+    async with limites.admitir(request, "login", cuenta=data.email):
+        statement = (
+            select(User)
+            .where(User.email == data.email)
+            .options(selectinload(User.profile))  # Cargar perfil si es necesario
+        )
+        user = (await session.exec(statement)).first()
+        if not user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuario no existente")
+        valida, nuevo_hash = await verify_and_update(data.password, user.password)
+        if not valida:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Constraseña incorrecta")
+        if nuevo_hash:
+            # Hash con otro costo (BCRYPT_ROUNDS cambió): se guarda el regenerado
+            user.password = nuevo_hash
+            session.add(user)
+
+    # Refresh token de una familia nueva; se descartan los vencidos del usuario
+    await session.exec(
+        delete(RefreshToken).where(RefreshToken.user_id == user.id, RefreshToken.expira < datetime.utcnow())
     )
-    user = session.exec(statement).first()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuario no existente")
-    if  not verify_password(data.password, user.password):
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Constraseña incorrecta")
+    refresh_token = nuevo_refresh_token(session, user.id)
+    await session.commit()
 
     #return {"message": "Login satisfactorio", "email": user.email, "id": user.id, "username": user.username}
-    token = create_access_token({"sub": str(user.id)})
+    token = token_usuario(user)
     return {
         "message": "Login satisfactorio", 
         "access_token": token,  
+        "refresh_token": refresh_token,
         "token_type": "bearer", 
         "email": user.email, 
         "id": user.id, 
@@ -41,3 +60,40 @@ def login(data: LoginData, session: Session = Depends(get_session)):
         "imagen_url": user.profile.imagen_url if user.profile else None
  }
 
+
+# 📌 Nuevo access token a cambio de un refresh token (sin contraseña ni bcrypt)
+@router.post("/refresh")
+async def refresh(data: RefreshData, session: AsyncSession = Depends(get_async_session)):
+    fila = (await session.exec(
+        select(RefreshToken, User)
+        .join(User, User.id == RefreshToken.user_id)
+        .where(RefreshToken.token_hash == hash_refresh_token(data.refresh_token))
+    )).first()
+    if fila is None:
+        raise credenciales_invalidas("Refresh token inválido")
+    guardado, user = fila
+
+    if guardado.expira <= datetime.utcnow():
+        raise credenciales_invalidas("Refresh token vencido")
+
+    # Se marca como usado solo si nadie lo usó antes (también entre requests simultáneos)
+    usado = await session.exec(
+        update(RefreshToken)
+        .where(RefreshToken.id == guardado.id, RefreshToken.revocado == False)
+        .values(revocado=True)
+    )
+    if usado.rowcount != 1:
+        # Ya rotado (alguien más tiene una copia) o revocado: se revoca toda la familia
+        await session.exec(
+            update(RefreshToken).where(RefreshToken.familia == guardado.familia).values(revocado=True)
+        )
+        await session.commit()
+        raise credenciales_invalidas("Refresh token revocado o ya utilizado: vuelva a iniciar sesión")
+
+    nuevo = nuevo_refresh_token(session, user.id, guardado.familia)
+    await session.commit()
+    return {
+        "access_token": token_usuario(user),
+        "refresh_token": nuevo,
+        "token_type": "bearer",
+    }
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, File, Form, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, File, Form, UploadFile, Request, Response
 from sqlmodel import Session, select
-from app.db.database import get_session
+from app.db.database import get_session, get_async_session, get_async_read_session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models.categorias import Categoria
 
 from app.utils.image_categoria import save_image_categoria, delete_image_categoria
 from app.auth.auth import require_admin
+from app.services import busqueda, catalogo, relacionados
+from app.core.etag import no_modificado
 
 router = APIRouter(prefix="/categorias", tags=["categorias"])
 
@@ -14,7 +17,7 @@ async def create_categoria(
     nombre: str = Form(...),
     descripcion: str = Form(...),
     imagen: UploadFile = File(None),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     #user = Depends(require_admin)
 ):
 
@@ -43,8 +46,11 @@ async def create_categoria(
     
        # Persistir en la base de datos
     session.add(categoria)
-    session.commit()
-    session.refresh(categoria)
+    await session.run_sync(catalogo.registrar_cambio)
+    await session.commit()
+    await session.refresh(categoria)
+
+    catalogo.invalidar()
 
     # Devolver respuesta al frontend
     return {
@@ -55,14 +61,21 @@ async def create_categoria(
     }
 
 @router.get("/")
-async def get_categoria(session: Session = Depends(get_session)):
-    categorias = session.exec(select(Categoria)).all()
+async def get_categoria(
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_async_read_session)
+):
+    no_mod = no_modificado(request, response, await catalogo.etag_async())
+    if no_mod is not None:
+        return no_mod
+    categorias = (await session.exec(select(Categoria))).all()
     return categorias
 
 
 @router.get("/{categoria_id}", response_model=Categoria)
-async def get_categoria(categoria_id: int, session: Session = Depends(get_session)):
-    categoria = session.get(Categoria, categoria_id)
+async def get_categoria(categoria_id: int, session: AsyncSession = Depends(get_async_read_session)):
+    categoria = await session.get(Categoria, categoria_id)
     if not categoria:
         raise HTTPException(status_code=404, detail="Categoria no encontrada")
     return categoria
@@ -74,12 +87,10 @@ async def update_categoria(
     nombre: str = Form(None),
     descripcion: str = Form(None),
     imagen: UploadFile = File(None),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     user = Depends(require_admin)
 ):
-    categoria = session.exec(
-        select(Categoria).where(Categoria.id == categoria_id)
-    ).first()
+    categoria = await session.get(Categoria, categoria_id)
     if not categoria:
         raise HTTPException(status_code=404, detail="Categoria no encontrada")
 
@@ -98,14 +109,20 @@ async def update_categoria(
             raise HTTPException(status_code=400, detail=str(e))
 
     # Actualizar los campos si se envían
-    if nombre is not None and nombre != "string":
+    if nombre is not None and nombre != "string" and nombre != categoria.name:
         categoria.name = nombre
+        # El nombre forma parte del documento de búsqueda de sus cursos
+        session.add(categoria)
+        await session.run_sync(busqueda.reindexar_categoria, categoria_id)
     if descripcion is not None and descripcion != "string":
         categoria.descripcion = descripcion
 
     session.add(categoria)
-    session.commit()
-    session.refresh(categoria)
+    await session.run_sync(catalogo.registrar_cambio)
+    await session.commit()
+    await session.refresh(categoria)
+
+    catalogo.invalidar()
     return {
         "id": categoria.id,
         "name": categoria.name,
@@ -128,6 +145,13 @@ def delete_categoria(
     if categoria.imagen_id:
         delete_image_categoria(categoria.imagen_id)
 
+    cursos_ids = busqueda.cursos_de_categoria(session, categoria_id)
     session.delete(categoria)
+    session.flush()
+    busqueda.reindexar_cursos(session, cursos_ids)
+    catalogo.registrar_cambio(session)
     session.commit()
+
+    catalogo.invalidar()
+    relacionados.quitar_categoria(categoria_id)
     return {"message": "Categoria eliminada correctamente"}
@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Depends, Form, UploadFile, File, Request, HTTPException, Query 
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends, Form, UploadFile, File, Request, Response, HTTPException, Query 
+from sqlmodel import Session, select, delete
 from typing import List, Optional  # Import List from typing
-from app.db.database import get_session
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.db.database import get_session, get_async_session, get_read_session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models.cursos import Curso  # Importar el modelo correspondiente
 from app.models.profesores import Profesor  # Importar el modelo correspondiente
 from app.models.categorias import Categoria  # Importar el modelo Categorias
 from app.models.cursos_categorias import CursoCategoria  # Importar el modelo CursoCategoria
 
 from app.utils.image_curso import save_image_curso, delete_image_curso
+from app.services import busqueda, catalogo, facetas, importacion, relacionados, snapshot
+from app.core.etag import no_modificado
 
 from enum import Enum
 
@@ -21,8 +25,57 @@ class NivelCursoEnum(str, Enum):
     avanzado = "Avanzado"
 
 
+class OrdenCursoEnum(str, Enum):
+    id = "id"
+    precio = "precio"
+    duracion = "duracion"
+    titulo = "titulo"
+
+
+class DireccionEnum(str, Enum):
+    asc = "asc"
+    desc = "desc"
+
+
 # 📌 Crear un curso
-from app.schemas.cursos import CursoOut, CategoriaOut, ProfesorOut
+from app.schemas.cursos import CursoOut, CategoriaOut, ProfesorOut, CursoFiltros, CursoFacetas, ImportacionResultado, CursoCampos, CursoIds
+
+
+def filtros_cursos(
+    nivel: Optional[NivelCursoEnum] = Query(None),
+    destacado: Optional[bool] = Query(None),
+    profesor_id: Optional[int] = Query(None),
+    categoria_id: Optional[int] = Query(None),
+    precio_min: Optional[float] = Query(None, ge=0),
+    precio_max: Optional[float] = Query(None, ge=0),
+    duracion_min: Optional[int] = Query(None, ge=0),
+    duracion_max: Optional[int] = Query(None, ge=0),
+) -> CursoFiltros:
+    return CursoFiltros(
+        nivel=nivel.value if nivel else None,
+        destacado=destacado,
+        profesor_id=profesor_id,
+        categoria_id=categoria_id,
+        precio_min=precio_min,
+        precio_max=precio_max,
+        duracion_min=duracion_min,
+        duracion_max=duracion_max,
+    )
+
+
+def campos_cursos(
+    fields: Optional[str] = Query(None, description="Campos a devolver, p. ej. id,titulo,precio,imagen_url"),
+    include: Optional[str] = Query(None, description="Relaciones a incluir: profesor,categorias"),
+) -> Optional[CursoCampos]:
+    try:
+        return catalogo.parsear_campos(fields, include)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def respuesta_parcial(datos, response: Response) -> JSONResponse:
+    # Las respuestas con ?fields= no cumplen CursoOut: se devuelven sin response_model
+    return JSONResponse(content=datos, headers=dict(response.headers))
 
 
 @router.post("/", response_model=CursoOut)
@@ -36,17 +89,21 @@ async def create_curso(
     profesor_id: int = Form(...),
     categorias_id: List[int] = Form(...),
     imagen: UploadFile = File(None),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     user = Depends(require_admin)
 ):
 
-    profesor = session.get(Profesor, profesor_id)
+    profesor = await session.get(Profesor, profesor_id)
     if not profesor:
         raise HTTPException(status_code=404, detail="Profesor no encontrado")
 
+    # Todas las categorías en una sola consulta (antes era un SELECT por categoría)
+    encontradas = {
+        c.id: c for c in (await session.exec(select(Categoria).where(Categoria.id.in_(categorias_id)))).all()
+    }
     categorias = []
-    for cat_id in categorias_id:
-        categoria = session.get(Categoria, cat_id)
+    for cat_id in dict.fromkeys(categorias_id):
+        categoria = encontradas.get(cat_id)
         if not categoria:
             raise HTTPException(status_code=404, detail=f"Categoría con ID {cat_id} no existe")
         categorias.append(categoria)
@@ -81,15 +138,21 @@ async def create_curso(
     )
     
     session.add(curso)
-    session.flush()  # obtiene curso.id sin cerrar la transacción
+    await session.flush()  # obtiene curso.id sin cerrar la transacción
     
     # Relacionar el curso con las categorías seleccionadas
     for categoria in categorias:
         curso_categoria = CursoCategoria(curso_id=curso.id, categoria_id=categoria.id)
         session.add(curso_categoria)
+
+    await session.run_sync(busqueda.indexar, curso, profesor, categorias)
+    await session.run_sync(catalogo.registrar_cambio)
     
-    session.commit()
-    session.refresh(curso)
+    await session.commit()
+    await session.refresh(curso)
+
+    catalogo.invalidar()
+    relacionados.actualizar(curso, [c.id for c in categorias])
 
     # Construir el response enriquecido
     categorias_out = [CategoriaOut(id=c.id, name=c.name) for c in categorias]
@@ -116,171 +179,251 @@ async def create_curso(
     )
 
 
-# 📌 Obtener todos los cursos
-@router.get("/", response_model=List[CursoOut])
-def listar_cursos(session: Session = Depends(get_session)):
-    cursos = session.exec(select(Curso)).all()
-    cursos_out = []
-    for curso in cursos:
-        # Obtener profesor
-        profesor = session.get(Profesor, curso.profesor_id)
-        profesor_out = ProfesorOut(id=profesor.id, name=profesor.name, profesion=profesor.profesion,imagen_url=profesor.imagen_url) if profesor else None
-        # Obtener categorías
-        categorias = (
-            session.exec(
-                select(Categoria)
-                .join(CursoCategoria, Categoria.id == CursoCategoria.categoria_id)
-                .where(CursoCategoria.curso_id == curso.id)
-            ).all()
+# 📌 Importar cursos en bloque
+# Cuerpo CSV (Content-Type: text/csv, con encabezado) o NDJSON
+# (application/x-ndjson, un objeto por línea). En CSV, categorias_id va como "1;2;3".
+@router.post("/import", response_model=ImportacionResultado)
+async def importar_cursos(
+    request: Request,
+    session: Session = Depends(get_session),
+    user = Depends(require_admin)
+):
+    formato = importacion.formato_de(request.headers.get("content-type", ""))
+    if formato is None:
+        raise HTTPException(
+            status_code=415,
+            detail="Formato no soportado: use text/csv o application/x-ndjson",
         )
-        categorias_out = [CategoriaOut(id=c.id, name=c.name) for c in categorias]
-        cursos_out.append(
-            CursoOut(
-                id=curso.id,
-                titulo=curso.titulo,
-                descripcion=curso.descripcion,
-                duracion=curso.duracion,
-                precio=curso.precio,
-                nivel=curso.nivel,
-                destacado=curso.destacado,
-                imagen_url=getattr(curso, 'imagen_url', None),
-                profesor=profesor_out,
-                categorias=categorias_out
-            )
+    return await importacion.importar(request, session, formato)
+
+
+# 📌 Obtener todos los cursos (paginado por cursor)
+# El cursor de la página siguiente se devuelve en el header X-Next-Cursor
+@router.get("/", response_model=List[CursoOut])
+def listar_cursos(
+    request: Request,
+    response: Response,
+    filtros: CursoFiltros = Depends(filtros_cursos),
+    orden: OrdenCursoEnum = Query(OrdenCursoEnum.id),
+    direccion: DireccionEnum = Query(DireccionEnum.asc),
+    limit: int = Query(catalogo.LIMITE_POR_DEFECTO, ge=1, le=200),
+    cursor: Optional[str] = Query(None),
+    campos: Optional[CursoCampos] = Depends(campos_cursos),
+    session: Session = Depends(get_read_session)
+):
+    no_mod = no_modificado(request, response, catalogo.etag())
+    if no_mod is not None:
+        return no_mod
+
+    # El listado completo sin filtros en el orden por defecto sale del snapshot precodificado
+    if (
+        orden == OrdenCursoEnum.id and direccion == DireccionEnum.asc
+        and filtros == CursoFiltros() and campos is None
+    ):
+        snap = snapshot.actual()
+        try:
+            variantes, siguiente = snap.pagina(limit, cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        headers = {"X-Next-Cursor": siguiente} if siguiente else None
+        return snapshot.responder(request, snap, variantes, headers)
+
+    try:
+        cursos_out, siguiente = catalogo.paginar(
+            session, filtros, orden.value, direccion.value, limit, cursor, campos
         )
-        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if siguiente:
+        response.headers["X-Next-Cursor"] = siguiente
+    if campos is not None:
+        return respuesta_parcial(cursos_out, response)
     return cursos_out
 
 # 📌 Obtener cursos destacados
 @router.get("/destacados", response_model=List[CursoOut])
-def cursos_destacados(session: Session = Depends(get_session)):
-    cursos = session.exec(select(Curso).where(Curso.destacado == True)).all()
-    cursos_out = []
-    for curso in cursos:
-        profesor = session.get(Profesor, curso.profesor_id)
-        profesor_out = ProfesorOut(id=profesor.id, name=profesor.name, profesion=profesor.profesion, imagen_url=profesor.imagen_url) if profesor else None
-        categorias = (
-            session.exec(
-                select(Categoria)
-                .join(CursoCategoria, Categoria.id == CursoCategoria.categoria_id)
-                .where(CursoCategoria.curso_id == curso.id)
-            ).all()
-        )
-        categorias_out = [CategoriaOut(id=c.id, name=c.name) for c in categorias]
-        cursos_out.append(
-            CursoOut(
-                id=curso.id,
-                titulo=curso.titulo,
-                descripcion=curso.descripcion,
-                duracion=curso.duracion,
-                precio=curso.precio,
-                nivel=curso.nivel,
-                destacado=curso.destacado,
-                imagen_url=getattr(curso, 'imagen_url', None),
-                profesor=profesor_out,
-                categorias=categorias_out
-            )
-        )
-    return cursos_out
+def cursos_destacados(
+    request: Request,
+    response: Response,
+    campos: Optional[CursoCampos] = Depends(campos_cursos),
+    session: Session = Depends(get_read_session)
+):
+    no_mod = no_modificado(request, response, catalogo.etag())
+    if no_mod is not None:
+        return no_mod
+    if campos is not None:
+        return respuesta_parcial(catalogo.listar_destacados(session, campos), response)
+    snap = snapshot.actual()
+    return snapshot.responder(request, snap, snap.destacados)
+
+
+# 📌 Conteos por faceta (nivel, categoría, profesor y rango de precio)
+# Acepta los mismos filtros que el listado
+@router.get("/facets", response_model=CursoFacetas)
+def facetas_cursos(
+    request: Request,
+    response: Response,
+    filtros: CursoFiltros = Depends(filtros_cursos),
+    session: Session = Depends(get_read_session)
+):
+    no_mod = no_modificado(request, response, catalogo.etag())
+    if no_mod is not None:
+        return no_mod
+    return facetas.obtener(session, filtros)
+
+
+# 📌 Buscar cursos por texto (título, descripción, categorías y profesor)
+@router.get("/search", response_model=List[CursoOut])
+def buscar_cursos(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=2, max_length=100),
+    pagina: int = Query(1, ge=1),
+    limit: int = Query(20, ge=1, le=100),
+    session: Session = Depends(get_read_session)
+):
+    no_mod = no_modificado(request, response, catalogo.etag())
+    if no_mod is not None:
+        return no_mod
+    ids = busqueda.buscar(session, q, limit, (pagina - 1) * limit)
+    snap = snapshot.actual()
+    return snapshot.responder(request, snap, snapshot.Variantes(snap.lista(ids)))
+
+
+# 📌 Exportar el catálogo completo en NDJSON (un curso por línea, en streaming)
+@router.get("/export.ndjson")
+def exportar_cursos(request: Request, response: Response):
+    no_mod = no_modificado(request, response, catalogo.etag())
+    if no_mod is not None:
+        return no_mod
+    return StreamingResponse(
+        catalogo.exportar_ndjson(),
+        media_type="application/x-ndjson",
+        headers=dict(response.headers),
+    )
+
+
+# 📌 Obtener varios cursos por ID en una sola llamada (carrito, favoritos, compras)
+# Se devuelven en el orden pedido; los IDs inexistentes se omiten.
+def cursos_por_ids(
+    ids: List[int],
+    request: Request,
+    response: Response,
+    campos: Optional[CursoCampos],
+    session: Session,
+):
+    ids = list(dict.fromkeys(ids))
+    if campos is not None:
+        return respuesta_parcial(catalogo.listar_por_ids(session, ids, campos), response)
+    snap = snapshot.actual()
+    return snapshot.responder(request, snap, snapshot.Variantes(snap.lista(ids)))
+
+
+@router.get("/batch", response_model=List[CursoOut])
+def obtener_cursos_batch(
+    request: Request,
+    response: Response,
+    ids: str = Query(..., description="IDs separados por coma, p. ej. 1,2,3"),
+    campos: Optional[CursoCampos] = Depends(campos_cursos),
+    session: Session = Depends(get_read_session)
+):
+    try:
+        datos = CursoIds(ids=[int(i) for i in ids.split(",") if i.strip()])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"IDs inválidos: {e}")
+    no_mod = no_modificado(request, response, catalogo.etag())
+    if no_mod is not None:
+        return no_mod
+    return cursos_por_ids(datos.ids, request, response, campos, session)
+
+
+# Variante POST para listas largas que no entran en la URL
+@router.post("/batch", response_model=List[CursoOut])
+def obtener_cursos_batch_post(
+    datos: CursoIds,
+    request: Request,
+    response: Response,
+    campos: Optional[CursoCampos] = Depends(campos_cursos),
+    session: Session = Depends(get_read_session)
+):
+    return cursos_por_ids(datos.ids, request, response, campos, session)
 
 
 # 📌 Obtener curso por ID
 @router.get("/{curso_id}", response_model=CursoOut)
-def obtener_curso(curso_id: int, session: Session = Depends(get_session)):
-    curso = session.get(Curso, curso_id)
-    if not curso:
+def obtener_curso(
+    curso_id: int,
+    request: Request,
+    response: Response,
+    campos: Optional[CursoCampos] = Depends(campos_cursos),
+    session: Session = Depends(get_read_session)
+):
+    no_mod = no_modificado(request, response, catalogo.etag())
+    if no_mod is not None:
+        return no_mod
+    if campos is not None:
+        curso_out = catalogo.obtener(session, curso_id, campos)
+        if curso_out is None:
+            raise HTTPException(status_code=404, detail="Curso no encontrado")
+        return respuesta_parcial(curso_out, response)
+    snap = snapshot.actual()
+    cuerpo = snap.curso(curso_id)
+    if cuerpo is None:
         raise HTTPException(status_code=404, detail="Curso no encontrado")
-    profesor = session.get(Profesor, curso.profesor_id)
-    profesor_out = ProfesorOut(id=profesor.id, name=profesor.name, profesion=profesor.profesion, imagen_url=profesor.imagen_url) if profesor else None
-    categorias = (
-        session.exec(
-            select(Categoria)
-            .join(CursoCategoria, Categoria.id == CursoCategoria.categoria_id)
-            .where(CursoCategoria.curso_id == curso.id)
-        ).all()
-    )
-    categorias_out = [CategoriaOut(id=c.id, name=c.name) for c in categorias]
-    return CursoOut(
-        id=curso.id,
-        titulo=curso.titulo,
-        descripcion=curso.descripcion,
-        duracion=curso.duracion,
-        precio=curso.precio,
-        nivel=curso.nivel,
-        destacado=curso.destacado,
-        imagen_url=getattr(curso, 'imagen_url', None),
-        profesor=profesor_out,
-        categorias=categorias_out
-    )
+    return snapshot.responder(request, snap, snapshot.Variantes(cuerpo))
+
+# 📌 Cursos relacionados (misma categoría, profesor o nivel), del más al menos parecido
+@router.get("/{curso_id}/related", response_model=List[CursoOut])
+def cursos_relacionados(
+    curso_id: int,
+    request: Request,
+    response: Response,
+    k: int = Query(6, ge=1, le=relacionados.K_MAX),
+    session: Session = Depends(get_read_session)
+):
+    no_mod = no_modificado(request, response, catalogo.etag())
+    if no_mod is not None:
+        return no_mod
+    snap = snapshot.actual()
+    if snap.curso(curso_id) is None:
+        raise HTTPException(status_code=404, detail="Curso no encontrado")
+    ids = relacionados.relacionados(session, curso_id, k)
+    return snapshot.responder(request, snap, snapshot.Variantes(snap.lista(ids)))
 
 # 📌 Obtener cursos por profesor
 @router.get("/profesor/{profesor_id}", response_model=List[CursoOut])
-def cursos_por_profesor(profesor_id: int, session: Session = Depends(get_session)):
-    cursos = session.exec(select(Curso).where(Curso.profesor_id == profesor_id)).all()
-    profesor = session.get(Profesor, profesor_id)
-    profesor_out = ProfesorOut(id=profesor.id, name=profesor.name) if profesor else None
-    cursos_out = []
-    for curso in cursos:
-        categorias = (
-            session.exec(
-                select(Categoria)
-                .join(CursoCategoria, Categoria.id == CursoCategoria.categoria_id)
-                .where(CursoCategoria.curso_id == curso.id)
-            ).all()
-        )
-        categorias_out = [CategoriaOut(id=c.id, name=c.name) for c in categorias]
-        cursos_out.append(
-            CursoOut(
-                id=curso.id,
-                titulo=curso.titulo,
-                descripcion=curso.descripcion,
-                duracion=curso.duracion,
-                precio=curso.precio,
-                nivel=curso.nivel,
-                destacado=curso.destacado,
-                imagen_url=getattr(curso, 'imagen_url', None),
-                profesor=profesor_out,
-                categorias=categorias_out
-            )
-        )
+def cursos_por_profesor(
+    profesor_id: int,
+    request: Request,
+    response: Response,
+    campos: Optional[CursoCampos] = Depends(campos_cursos),
+    session: Session = Depends(get_read_session)
+):
+    no_mod = no_modificado(request, response, catalogo.etag())
+    if no_mod is not None:
+        return no_mod
+    cursos_out = catalogo.listar_por_profesor(session, profesor_id, campos)
+    if campos is not None:
+        return respuesta_parcial(cursos_out, response)
     return cursos_out
 
 
 # 📌 Obtener cursos por categoría
 @router.get("/categoria/{categoria_id}", response_model=List[CursoOut])
-def cursos_por_categoria(categoria_id: int, session: Session = Depends(get_session)):
-    stmt = (
-        select(Curso)
-        .join(CursoCategoria)
-        .where(CursoCategoria.categoria_id == categoria_id)
-    )
-    cursos = session.exec(stmt).all()
-    cursos_out = []
-    for curso in cursos:
-        profesor = session.get(Profesor, curso.profesor_id)
-        profesor_out = ProfesorOut(id=profesor.id, name=profesor.name) if profesor else None
-        categorias = (
-            session.exec(
-                select(Categoria)
-                .join(CursoCategoria, Categoria.id == CursoCategoria.categoria_id)
-                .where(CursoCategoria.curso_id == curso.id)
-            ).all()
-        )
-        categorias_out = [CategoriaOut(id=c.id, name=c.name) for c in categorias]
-        cursos_out.append(
-            CursoOut(
-                id=curso.id,
-                titulo=curso.titulo,
-                descripcion=curso.descripcion,
-                duracion=curso.duracion,
-                precio=curso.precio,
-                nivel=curso.nivel,
-                destacado=curso.destacado,
-                imagen_url=getattr(curso, 'imagen_url', None),
-                profesor=profesor_out,
-                categorias=categorias_out
-            )
-        )
+def cursos_por_categoria(
+    categoria_id: int,
+    request: Request,
+    response: Response,
+    campos: Optional[CursoCampos] = Depends(campos_cursos),
+    session: Session = Depends(get_read_session)
+):
+    no_mod = no_modificado(request, response, catalogo.etag())
+    if no_mod is not None:
+        return no_mod
+    cursos_out = catalogo.listar_por_categoria(session, categoria_id, campos)
+    if campos is not None:
+        return respuesta_parcial(cursos_out, response)
     return cursos_out
 
 # 📌 Actualizar un curso
@@ -296,10 +439,10 @@ async def actualizar_curso(
     profesor_id: Optional[int] = Form(None),
     categorias_id: Optional[List[int]] = Form(None),
     imagen: Optional[UploadFile] = File(None),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     user = Depends(require_admin)
 ):
-    curso = session.get(Curso, curso_id)
+    curso = await session.get(Curso, curso_id)
     if not curso:
         raise HTTPException(status_code=404, detail="Curso no encontrado")
 
@@ -319,12 +462,40 @@ async def actualizar_curso(
 
     # Actualizar profesor si se envía
     if profesor_id is not None and profesor_id != 0:
-        profesor = session.get(Profesor, profesor_id)
+        profesor = await session.get(Profesor, profesor_id)
         if not profesor:
             raise HTTPException(status_code=404, detail="Profesor no encontrado")
         curso.profesor_id = profesor_id
     else:
-        profesor = session.get(Profesor, curso.profesor_id)
+        profesor = await session.get(Profesor, curso.profesor_id)
+
+    # 5) Actualizo categorías: solo se agregan/quitan los vínculos que cambian.
+    # Va antes de la imagen para no subirla si alguna categoría no existe.
+    if categorias_id is not None:
+        # a) Filtrar IDs válidas
+        valid_ids = {int(cid) for cid in categorias_id if str(cid).isdigit() and int(cid) > 0}
+
+        # b) Comprobar la existencia de todas las categorías en una sola consulta
+        existentes = set((await session.exec(
+            select(Categoria.id).where(Categoria.id.in_(valid_ids))
+        )).all())
+        faltantes = sorted(valid_ids - existentes)
+        if faltantes:
+            raise HTTPException(status_code=404, detail=f"Categoría con ID {faltantes[0]} no existe")
+
+        # c) Diferencia con los vínculos actuales (todo en la misma transacción)
+        actuales = set((await session.exec(
+            select(CursoCategoria.categoria_id).where(CursoCategoria.curso_id == curso.id)
+        )).all())
+        quitar = actuales - valid_ids
+        if quitar:
+            await session.exec(
+                delete(CursoCategoria)
+                .where(CursoCategoria.curso_id == curso.id)
+                .where(CursoCategoria.categoria_id.in_(quitar))
+            )
+        for cid in valid_ids - actuales:
+            session.add(CursoCategoria(curso_id=curso.id, categoria_id=cid))
 
     # Actualizar imagen si se envía
     if imagen and imagen.filename:
@@ -339,34 +510,22 @@ async def actualizar_curso(
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error al guardar imagen: {e}")
 
-     # 5) Actualizo categorías manualmente
-    if categorias_id is not None:
-        # a) Filtrar IDs válidas
-        valid_ids = [int(cid) for cid in categorias_id if str(cid).isdigit() and int(cid) > 0]
-
-        # b) Eliminar todas las relaciones previas de este curso
-        session.query(CursoCategoria).filter(CursoCategoria.curso_id == curso.id).delete()
-        session.commit()
-
-        # c) Insertar nuevas relaciones
-        for cid in valid_ids:
-            # (opcional) comprobar existencia de cada categoría
-            if not session.get(Categoria, cid):
-                raise HTTPException(status_code=404, detail=f"Categoría con ID {cid} no existe")
-            session.add(CursoCategoria(curso_id=curso.id, categoria_id=cid))
-        session.commit()
-
-    # 6) Persisto curso y refresco
+    # 6) Vuelvo a leer las categorías para el índice de búsqueda y el output
     session.add(curso)
-    session.commit()
-    session.refresh(curso)
-
-    # 7) Vuelvo a leer las categorías para el output
-    categorias = session.exec(
+    categorias = (await session.exec(
         select(Categoria)
         .join(CursoCategoria, Categoria.id == CursoCategoria.categoria_id)
         .where(CursoCategoria.curso_id == curso.id)
-    ).all()
+    )).all()
+    await session.run_sync(busqueda.indexar, curso, profesor, categorias)
+    await session.run_sync(catalogo.registrar_cambio)
+
+    # 7) Persisto curso y categorías en un único commit
+    await session.commit()
+    await session.refresh(curso)
+
+    catalogo.invalidar()
+    relacionados.actualizar(curso, [c.id for c in categorias])
 
     # 8) Construyo los schemas de salida
     profesor_img = getattr(profesor, "imagen_url", None)
@@ -411,7 +570,12 @@ def eliminar_curso(
     if curso.imagen_url:
         delete_image_curso(curso.imagen_id)
         
+    busqueda.quitar(session, curso_id)
     session.delete(curso)
+    catalogo.registrar_cambio(session)
     session.commit()
+
+    catalogo.invalidar()
+    relacionados.quitar(curso_id)
     return {"ok": True, "mensaje": "Curso eliminado correctamente"}
 
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, File, Form, UploadFile, Request
+from fastapi import APIRouter, Depends, HTTPException, File, Form, UploadFile, Request, Response
 from sqlmodel import Session, select
-from app.db.database import get_session
+from app.db.database import get_session, get_async_session, get_async_read_session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models.profesores import Profesor  # Importar el modelo correspondiente
 
 from app.utils.image_profesor import save_image_profesor, delete_image_profesor
 from app.auth.auth import require_admin
+from app.services import busqueda, catalogo, relacionados
+from app.core.etag import no_modificado
 
 router = APIRouter( prefix="/profesores", tags=["profesores"])
 
@@ -13,7 +16,7 @@ async def create_profesor(
     nombre: str = Form(...),
     profesion: str = Form(...),
     imagen: UploadFile = File(None),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     request: Request = None,
     user = Depends(require_admin)
     ):
@@ -45,8 +48,11 @@ async def create_profesor(
     
     
     session.add(profesor)
-    session.commit()
-    session.refresh(profesor)
+    await session.run_sync(catalogo.registrar_cambio)
+    await session.commit()
+    await session.refresh(profesor)
+
+    catalogo.invalidar()
 
     return {
             "id": profesor.id,
@@ -57,14 +63,19 @@ async def create_profesor(
 
 @router.get("/")
 async def get_profesor(
-    session: Session = Depends(get_session)
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_async_read_session)
     ):
-    profesores = session.exec(select(Profesor)).all()
+    no_mod = no_modificado(request, response, await catalogo.etag_async())
+    if no_mod is not None:
+        return no_mod
+    profesores = (await session.exec(select(Profesor))).all()
     return profesores
 
 @router.get("/{profesor_id}", response_model=Profesor)
-async def get_profesor(profesor_id: int, session: Session = Depends(get_session)):
-    profesor = session.get(Profesor, profesor_id)
+async def get_profesor(profesor_id: int, session: AsyncSession = Depends(get_async_read_session)):
+    profesor = await session.get(Profesor, profesor_id)
     if not profesor:
         raise HTTPException(status_code=404, detail="Profesor no encontrado")
     return profesor
@@ -75,12 +86,10 @@ async def update_profesor(
     nombre: str = Form(None),
     profesion: str = Form(None),
     imagen: UploadFile = File(None), 
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     user = Depends(require_admin)
 ):
-    profesor = session.exec(
-        select(Profesor).where(Profesor.id == profesor_id)
-    ).first()
+    profesor = await session.get(Profesor, profesor_id)
     if not profesor:
         raise HTTPException(status_code=404, detail="Profesor no encontrado")
     # Procesar la imagen solo si se proporciona una nueva
@@ -97,14 +106,20 @@ async def update_profesor(
             raise HTTPException(status_code=400, detail=str(e))
 
     # Actualizar los campos si se envían
-    if nombre is not None and nombre != "string":
+    if nombre is not None and nombre != "string" and nombre != profesor.name:
         profesor.name = nombre
+        # El nombre forma parte del documento de búsqueda de sus cursos
+        session.add(profesor)
+        await session.run_sync(busqueda.reindexar_profesor, profesor_id)
     if profesion is not None and profesion != "string":
         profesor.profesion = profesion
         
     session.add(profesor)
-    session.commit()
-    session.refresh(profesor)
+    await session.run_sync(catalogo.registrar_cambio)
+    await session.commit()
+    await session.refresh(profesor)
+
+    catalogo.invalidar()
     return {
         "id": profesor.id,
         "name": profesor.name,
@@ -128,6 +143,10 @@ def delete_profesor(
         delete_image_profesor(profesor.imagen_id)
         
     session.delete(profesor)
+    catalogo.registrar_cambio(session)
     session.commit()
+
+    catalogo.invalidar()
+    relacionados.descartar()
     return {"message": "Profesor eliminado correctamente"}
 
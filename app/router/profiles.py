@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models.profiles import Profile
 from app.models.users import User
-from app.auth.auth import get_current_user, get_session
+from app.auth.auth import get_current_user
+from app.db.database import get_async_session
 from app.utils.image_handler import save_image, delete_image
 
 
@@ -18,13 +20,13 @@ async def create_profile(
     provincia: str = Form(None),
     bio: str = Form(None),
     request: Request = None,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user = Depends(get_current_user)
 ):
     # Comprobar si el usuario ya tiene perfil
-    existing = session.exec(
+    existing = (await session.exec(
         select(Profile).where(Profile.user_id == current_user.id)
-    ).first()
+    )).first()
     if existing:
         raise HTTPException(status_code=400, detail="Ya tienes un perfil")
 
@@ -57,8 +59,8 @@ async def create_profile(
     )
 
     session.add(profile)
-    session.commit()
-    session.refresh(profile)
+    await session.commit()
+    await session.refresh(profile)
 
     # Devuelves la URL pública en la respuesta
     return {
@@ -77,11 +79,11 @@ async def create_profile(
 @router.get("/")
 async def get_profile(
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
-    profile = session.exec(
+    profile = (await session.exec(
         select(Profile).where(Profile.user_id == current_user.id)
-    ).first()
+    )).first()
 
     if not profile:
         raise HTTPException(status_code=404, detail="Perfil no encontrado")
@@ -92,11 +94,11 @@ async def get_profile(
 @router.delete("/")
 async def delete_profile(
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
-    profile = session.exec(
+    profile = (await session.exec(
         select(Profile).where(Profile.user_id == current_user.id)
-    ).first()
+    )).first()
 
     if not profile:
         raise HTTPException(status_code=404, detail="Perfil no encontrado")
@@ -105,8 +107,8 @@ async def delete_profile(
     if profile.imagen_url:
         delete_image(profile.imagen_url)
                
-    session.delete(profile)
-    session.commit()
+    await session.delete(profile)
+    await session.commit()
 
     return {"message": "Perfil eliminado correctamente"}
 
@@ -121,11 +123,11 @@ async def update_profile(
     bio: str = Form(None),
     imagen: UploadFile = File(None),
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
-    profile = session.exec(
+    profile = (await session.exec(
         select(Profile).where(Profile.user_id == current_user.id)
-    ).first()
+    )).first()
 
     if not profile:
         raise HTTPException(status_code=404, detail="Perfil no encontrado")
@@ -159,14 +161,14 @@ async def update_profile(
 
 
     session.add(profile)
-    session.commit()
-    session.refresh(profile)
+    await session.commit()
+    await session.refresh(profile)
     return profile
 
 
 @router.get("/listperfiles")
 async def get_perfiles(
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
     ):
-    perfiles = session.exec(select(Profile)).all()
+    perfiles = (await session.exec(select(Profile))).all()
     return perfiles
\ No newline at end of file
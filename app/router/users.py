@@ -1,13 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models.users import User
 from app.schemas.users import UserCreate, UserRead
-from app.db.database import get_session
+from app.db.database import get_session, get_async_session
 from app.auth.auth import require_admin
 
 from app.schemas.users import ChangePassword
-from app.core.security import verify_password, get_password_hash
-from app.auth.auth import get_current_user  # importa las funciones de autentificación
+from app.core import limites
+from app.core.security import hash_password, verify_and_update
+from app.auth.auth import get_current_user, invalidar_usuario, revocar_refresh_tokens  # importa las funciones de autentificación
 
 from pydantic import BaseModel
 
@@ -25,22 +27,23 @@ def list_users(
 
 
 @router.post("/", response_model=UserRead, status_code=201)
-def create_user(user: UserCreate, session: Session = Depends(get_session)):
+async def create_user(user: UserCreate, request: Request, session: AsyncSession = Depends(get_async_session)):
     
-    # Verificamos si el email o username ya existe
-    statement = select(User).where((User.email == user.email) | (User.username == user.username))
-    existing_user = session.exec(statement).first()
-    if existing_user:
-        raise HTTPException(status_code=400, detail="El usuario ya existe")
+    async with limites.admitir(request, "users", cuenta=user.email):
+        # Verificamos si el email o username ya existe
+        statement = select(User).where((User.email == user.email) | (User.username == user.username))
+        existing_user = (await session.exec(statement)).first()
+        if existing_user:
+            raise HTTPException(status_code=400, detail="El usuario ya existe")
     
-    hashed_pw = get_password_hash(user.password)
-    db_user = User(**user.model_dump(exclude={"password"}))  # Convertir Pydantic → SQLModel y Excluir contraseña en texto plano
-    db_user.password = hashed_pw  # Guardar la versión encriptada
+        hashed_pw = await hash_password(user.password)
+        db_user = User(**user.model_dump(exclude={"password"}))  # Convertir Pydantic → SQLModel y Excluir contraseña en texto plano
+        db_user.password = hashed_pw  # Guardar la versión encriptada
 
     
-    session.add(db_user)
-    session.commit()
-    session.refresh(db_user)
+        session.add(db_user)
+        await session.commit()
+        await session.refresh(db_user)
     return db_user  # Se convierte automáticamente en UserRead
 
 
@@ -67,14 +70,15 @@ def delete_user(
         raise HTTPException(status_code=404, detail="Este usuario no existe")
     session.delete(user)
     session.commit()
+    invalidar_usuario(user_id)
     
     return {"detail": "Usuario eliminado correctamente"}  # Mensaje de éxito
 
 
 @router.put("/{user_id}", response_model=UserRead, status_code=200)
-def update_user(
+async def update_user(
     user_id: int, 
-    user: UserCreate, session: Session = Depends(get_session),
+    user: UserCreate, session: AsyncSession = Depends(get_async_session),
     current_user: dict = Depends(get_current_user)  # Protección con autenticación
     ):
     
@@ -84,50 +88,57 @@ def update_user(
             (User.id != user_id) &  # Excluir el usuario actual
             ((User.email == user.email) | (User.username == user.username))
         )
-        existing_user = session.exec(statement).first()
+        existing_user = (await session.exec(statement)).first()
         if existing_user:
             raise HTTPException(
                 status_code=400,
                 detail="El email o username ya está en uso"
             )
             
-    hashed_pw = get_password_hash(user.password)  # Encriptar la nueva contraseña
-    db_user = session.get(User, user_id)
+    db_user = await session.get(User, user_id)
     if not db_user:
         raise HTTPException(status_code=404, detail="Este usuario no existe")
+    hashed_pw = await hash_password(user.password)  # Encriptar la nueva contraseña
         
     for key, value in user.model_dump(exclude={"password"}).items():  # Excluir el password en texto plano
         setattr(db_user, key, value)  # Actualizar los campos del usuario
 
     db_user.password = hashed_pw  # Guardar la versión encriptada de la contraseña
+    # La contraseña (y quizás el rol) cambia: se cierran las sesiones abiertas
+    db_user.token_version += 1
+    await session.exec(revocar_refresh_tokens(user_id))
 
     session.add(db_user)
-    session.commit()  
-    session.refresh(db_user)
+    await session.commit()  
+    invalidar_usuario(user_id)
+    await session.refresh(db_user)
     
     return db_user.model_dump()  # Convertir SQLModel → Pydantic      
 
 
 @router.patch("/change-password", status_code=status.HTTP_200_OK)
-def change_password(
+async def change_password(
     payload: ChangePassword,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user)
 ):
-    user = session.get(User, current_user.id)
+    user = await session.get(User, current_user.id)
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
 
-    if not verify_password(payload.current_password, user.password):
+    valida, _ = await verify_and_update(payload.current_password, user.password)
+    if not valida:
         raise HTTPException(
             status_code=401,
             detail="Contraseña actual incorrecta"
         )
 
-    user.password = get_password_hash(payload.new_password)
+    user.password = await hash_password(payload.new_password)
+    user.token_version += 1  # Cierra las sesiones abiertas con la contraseña anterior
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.exec(revocar_refresh_tokens(user.id))
+    await session.commit()
+    invalidar_usuario(user.id)
 
     return {"detail": "Contraseña actualizada correctamente"}
 
@@ -147,8 +158,10 @@ def update_user_role(
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
 
     db_user.role = payload.new_role
+    db_user.token_version += 1  # Los tokens con el rol anterior dejan de valer
     session.add(db_user)
     session.commit()
+    invalidar_usuario(user_id)
     session.refresh(db_user)
 
     return {"detail": f"Rol actualizado a {payload.new_role}"}
@@ -1,7 +1,9 @@
 # schemas/curso.py
 
-from pydantic import BaseModel
-from typing import List, Optional
+import re
+
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Literal, Optional
 
 class CategoriaOut(BaseModel):
     id: int
@@ -35,3 +37,71 @@ class CursoOut(BaseModel):
         from_attributes = True
         
 
+
+
+class CursoCampos(BaseModel):
+    columnas: List[str]
+    relaciones: List[str]
+
+
+class CursoIds(BaseModel):
+    ids: List[int] = Field(min_length=1, max_length=200)
+
+
+class CursoFiltros(BaseModel):
+    nivel: Optional[str] = None
+    destacado: Optional[bool] = None
+    profesor_id: Optional[int] = None
+    categoria_id: Optional[int] = None
+    precio_min: Optional[float] = None
+    precio_max: Optional[float] = None
+    duracion_min: Optional[int] = None
+    duracion_max: Optional[int] = None
+
+
+class FacetaValor(BaseModel):
+    clave: str
+    nombre: str
+    total: int
+
+
+class CursoFacetas(BaseModel):
+    total: int
+    nivel: List[FacetaValor]
+    categoria: List[FacetaValor]
+    profesor: List[FacetaValor]
+    precio: List[FacetaValor]
+
+
+class CursoImport(BaseModel):
+    titulo: str = Field(min_length=1, max_length=100)
+    descripcion: str = Field(min_length=1, max_length=500)
+    duracion: int = Field(ge=0)
+    precio: float = Field(ge=0)
+    nivel: Literal["Básico", "Intermedio", "Avanzado"] = "Básico"
+    destacado: bool = False
+    profesor_id: int
+    categorias_id: List[int] = []
+    imagen_url: Optional[str] = None
+
+    @field_validator("categorias_id", mode="before")
+    @classmethod
+    def separar_categorias(cls, valor):
+        # En CSV las categorías llegan como "1;2;3" (también se acepta "|")
+        if isinstance(valor, str):
+            return [v for v in re.split(r"[;|]", valor) if v.strip()]
+        return valor
+
+    @field_validator("nivel", "destacado", "imagen_url", mode="before")
+    @classmethod
+    def vacio_a_defecto(cls, valor, info):
+        # Las columnas vacías del CSV toman el valor por defecto
+        if valor == "":
+            return cls.model_fields[info.field_name].default
+        return valor
+
+
+class ImportacionResultado(BaseModel):
+    creados: int
+    errores: List[dict]
+    errores_omitidos: int = 0
@@ -1,5 +1,6 @@
 from sqlmodel import SQLModel
 from pydantic import EmailStr
+from typing import Optional
 
 class Token(SQLModel):
     access_token: str
@@ -8,4 +9,14 @@ class Token(SQLModel):
 
 class LoginData(SQLModel):
     email: EmailStr
-    password: str
\ No newline at end of file
+    password: str
+
+# Datos firmados en el access token (require_admin los usa sin leer el usuario)
+class TokenData(SQLModel):
+    id: int
+    role: Optional[str] = None
+    ver: Optional[int] = None
+
+
+class RefreshData(SQLModel):
+    refresh_token: str
@@ -0,0 +1,214 @@
+# app/services/busqueda.py
+
+# Búsqueda de texto completo sobre el catálogo de cursos.
+# Cada curso tiene un documento en curso_busqueda (título, descripción, nombres
+# de sus categorías y de su profesor) que mantienen los handlers de escritura.
+# En PostgreSQL se busca con tsvector/tsquery sobre el índice GIN; con otros
+# motores (por ejemplo SQLite en pruebas) se usa un índice invertido en memoria
+# con ranking BM25.
+
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from sqlalchemy import delete, func, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import Session, select
+
+from app.models.categorias import Categoria
+from app.models.curso_busqueda import CursoBusqueda
+from app.models.cursos import Curso
+from app.models.cursos_categorias import CursoCategoria
+from app.models.profesores import Profesor
+from app.services import catalogo
+
+# Debe coincidir con la expresión del índice GIN (ver CursoBusqueda)
+_CONFIG = literal_column("'spanish'")
+
+STOPWORDS = {
+    "a", "al", "con", "de", "del", "el", "en", "la", "las", "lo", "los",
+    "para", "por", "su", "sus", "un", "una", "y", "o", "e", "que",
+}
+
+
+def tokenizar(texto: str) -> List[str]:
+    """Minúsculas, sin acentos y sin palabras vacías."""
+    normalizado = unicodedata.normalize("NFKD", texto.lower())
+    sin_acentos = "".join(c for c in normalizado if not unicodedata.combining(c))
+    return [t for t in re.findall(r"\w+", sin_acentos) if t not in STOPWORDS]
+
+
+class IndiceInvertido:
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._terminos: Dict[int, Set[str]] = {}
+        self._longitudes: Dict[int, int] = {}
+        self._longitud_total = 0
+        self._lock = threading.Lock()
+        self.cargado = False
+
+    def agregar(self, curso_id: int, documento: str) -> None:
+        frecuencias = Counter(tokenizar(documento))
+        with self._lock:
+            self._quitar(curso_id)
+            for termino, tf in frecuencias.items():
+                self._postings.setdefault(termino, {})[curso_id] = tf
+            self._terminos[curso_id] = set(frecuencias)
+            longitud = sum(frecuencias.values())
+            self._longitudes[curso_id] = longitud
+            self._longitud_total += longitud
+
+    def quitar(self, curso_id: int) -> None:
+        with self._lock:
+            self._quitar(curso_id)
+
+    def _quitar(self, curso_id: int) -> None:
+        for termino in self._terminos.pop(curso_id, ()):
+            lista = self._postings[termino]
+            del lista[curso_id]
+            if not lista:
+                del self._postings[termino]
+        self._longitud_total -= self._longitudes.pop(curso_id, 0)
+
+    def buscar(self, consulta: str, limit: int, offset: int = 0) -> List[int]:
+        """Ids de los cursos que contienen todos los términos, ordenados por BM25."""
+        terminos = set(tokenizar(consulta))
+        if not terminos:
+            return []
+        with self._lock:
+            listas = [self._postings.get(t) for t in terminos]
+            if not all(listas):
+                return []
+            listas.sort(key=len)
+            candidatos = set(listas[0]).intersection(*listas[1:])
+            n = len(self._longitudes)
+            promedio = self._longitud_total / n
+            puntajes = dict.fromkeys(candidatos, 0.0)
+            for lista in listas:
+                idf = math.log(1 + (n - len(lista) + 0.5) / (len(lista) + 0.5))
+                for curso_id in candidatos:
+                    tf = lista[curso_id]
+                    norma = 1 - self.B + self.B * self._longitudes[curso_id] / promedio
+                    puntajes[curso_id] += idf * tf * (self.K1 + 1) / (tf + self.K1 * norma)
+        ordenados = sorted(puntajes, key=lambda c: (-puntajes[c], c))
+        return ordenados[offset:offset + limit]
+
+
+indice = IndiceInvertido()
+_carga_lock = threading.Lock()
+
+
+def _es_postgres(session: Session) -> bool:
+    return session.get_bind().dialect.name == "postgresql"
+
+
+def documento(curso: Curso, profesor: Optional[Profesor], categorias: Iterable[Categoria]) -> str:
+    partes = [curso.titulo, curso.descripcion, *(c.name for c in categorias)]
+    if profesor:
+        partes.append(profesor.name)
+    return " ".join(p for p in partes if p)
+
+
+# --- Mantenimiento (se llama desde los handlers, antes del commit) ---
+
+def _guardar(session: Session, documentos: Dict[int, str]) -> None:
+    """Crea o actualiza los documentos de varios cursos con una sola escritura."""
+    if not documentos:
+        return
+    if _es_postgres(session):
+        stmt = pg_insert(CursoBusqueda).values(
+            [{"curso_id": c, "documento": d} for c, d in documentos.items()]
+        )
+        session.exec(stmt.on_conflict_do_update(
+            index_elements=["curso_id"], set_={"documento": stmt.excluded.documento}
+        ))
+    else:
+        existentes = session.exec(
+            select(CursoBusqueda).where(CursoBusqueda.curso_id.in_(documentos))
+        ).all()
+        for fila in existentes:
+            fila.documento = documentos[fila.curso_id]
+        vistos = {fila.curso_id for fila in existentes}
+        session.add_all(
+            CursoBusqueda(curso_id=c, documento=d) for c, d in documentos.items() if c not in vistos
+        )
+    if indice.cargado:
+        for curso_id, texto in documentos.items():
+            indice.agregar(curso_id, texto)
+
+
+def indexar(
+    session: Session,
+    curso: Curso,
+    profesor: Optional[Profesor],
+    categorias: Iterable[Categoria],
+) -> None:
+    _guardar(session, {curso.id: documento(curso, profesor, categorias)})
+
+
+def quitar(session: Session, curso_id: int) -> None:
+    session.exec(delete(CursoBusqueda).where(CursoBusqueda.curso_id == curso_id))
+    indice.quitar(curso_id)
+
+
+def reindexar_cursos(session: Session, curso_ids: Sequence[int]) -> None:
+    if not curso_ids:
+        return
+    cursos = session.exec(catalogo.consulta_cursos().where(Curso.id.in_(curso_ids))).all()
+    _guardar(session, {c.id: documento(c, c.profesor, c.categoria) for c in cursos})
+
+
+def cursos_de_profesor(session: Session, profesor_id: int) -> List[int]:
+    return list(session.exec(select(Curso.id).where(Curso.profesor_id == profesor_id)).all())
+
+
+def cursos_de_categoria(session: Session, categoria_id: int) -> List[int]:
+    return list(session.exec(
+        select(CursoCategoria.curso_id).where(CursoCategoria.categoria_id == categoria_id)
+    ).all())
+
+
+def reindexar_profesor(session: Session, profesor_id: int) -> None:
+    reindexar_cursos(session, cursos_de_profesor(session, profesor_id))
+
+
+def reindexar_categoria(session: Session, categoria_id: int) -> None:
+    reindexar_cursos(session, cursos_de_categoria(session, categoria_id))
+
+
+# --- Consulta ---
+
+def _cargar_indice(session: Session) -> None:
+    if indice.cargado:
+        return
+    with _carga_lock:
+        if indice.cargado:
+            return
+        filas = session.exec(select(CursoBusqueda.curso_id, CursoBusqueda.documento)).all()
+        for curso_id, texto in filas:
+            indice.agregar(curso_id, texto)
+        indice.cargado = True
+
+
+def buscar(session: Session, consulta: str, limit: int, offset: int = 0) -> List[int]:
+    """Ids de los cursos que coinciden con la consulta, ordenados por relevancia."""
+    if not _es_postgres(session):
+        _cargar_indice(session)
+        return indice.buscar(consulta, limit, offset)
+
+    tsv = func.to_tsvector(_CONFIG, CursoBusqueda.documento)
+    tsq = func.websearch_to_tsquery(_CONFIG, consulta)
+    stmt = (
+        select(CursoBusqueda.curso_id)
+        .where(tsv.op("@@")(tsq))
+        .order_by(func.ts_rank(tsv, tsq).desc(), CursoBusqueda.curso_id)
+        .limit(limit)
+        .offset(offset)
+    )
+    return list(session.exec(stmt).all())
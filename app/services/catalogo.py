@@ -0,0 +1,408 @@
+# app/services/catalogo.py
+
+# Capa de consultas del catálogo de cursos.
+# Carga los cursos junto con su profesor y sus categorías en un número fijo
+# de consultas (selectinload), sin importar cuántos cursos se devuelvan.
+# Las lecturas públicas se guardan ya serializadas en una caché LRU+TTL.
+# La versión del catálogo vive en la base (tabla catalog_version) y es la misma
+# para todos los workers: cada escritura la incrementa en su transacción
+# (registrar_cambio) y cada worker la relee cada CATALOGO_VERSION_TTL segundos.
+# De ella salen el ETag y la invalidación: si cambió, se vacía la caché local.
+# Con ?fields=/?include= (CursoCampos) solo se leen las columnas pedidas y se
+# omiten las relaciones que nadie pidió.
+
+import base64
+import json
+import threading
+import time
+from typing import Any, Callable, Hashable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import load_only, selectinload
+from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.core.cache import TTLCache
+from app.db import database
+from app.db.database import read_session
+from app.models.catalogo_version import CatalogoVersion
+from app.models.cursos import Curso
+from app.models.cursos_categorias import CursoCategoria
+from app.schemas.cursos import CursoOut, CategoriaOut, ProfesorOut, CursoFiltros, CursoCampos
+
+
+# Columnas por las que se puede ordenar el listado (el id desempata siempre)
+ORDEN_COLUMNAS = {
+    "id": Curso.id,
+    "precio": Curso.precio,
+    "duracion": Curso.duracion,
+    "titulo": Curso.titulo,
+}
+
+LIMITE_POR_DEFECTO = 50
+
+# Campos que se pueden pedir con ?fields= y relaciones con ?include=
+COLUMNAS = ("id", "titulo", "descripcion", "duracion", "precio", "nivel", "destacado", "imagen_url")
+RELACIONES = ("profesor", "categorias")
+
+# Respuestas serializadas de CursoOut, por endpoint y parámetros
+cache = TTLCache(
+    maxsize=settings.CATALOGO_CACHE_MAXSIZE,
+    ttl=settings.CATALOGO_CACHE_TTL,
+)
+
+_FALTA = object()
+
+# Última versión leída de catalog_version y cuándo se leyó
+_version = 0
+_leida = float("-inf")
+_version_lock = threading.Lock()
+
+
+def _refrescar() -> None:
+    global _version, _leida
+    with _version_lock:
+        if time.monotonic() - _leida < settings.CATALOGO_VERSION_TTL:
+            return  # otro hilo la leyó mientras esperábamos el lock
+        # Siempre de la primaria: una réplica atrasada devolvería la versión anterior
+        with Session(database.engine) as session:
+            leida = session.exec(
+                select(CatalogoVersion.version).where(CatalogoVersion.id == 1)
+            ).first() or 0
+        if leida != _version:
+            cache.clear()
+            _version = leida
+        _leida = time.monotonic()
+
+
+def version() -> int:
+    """Versión compartida del catálogo (como mucho CATALOGO_VERSION_TTL segundos atrasada)."""
+    if time.monotonic() - _leida >= settings.CATALOGO_VERSION_TTL:
+        _refrescar()
+    return _version
+
+
+async def version_async() -> int:
+    """version() para handlers async: la lectura de la base va al threadpool."""
+    if time.monotonic() - _leida >= settings.CATALOGO_VERSION_TTL:
+        await run_in_threadpool(_refrescar)
+    return _version
+
+
+def etag(version_catalogo: Optional[int] = None) -> str:
+    if version_catalogo is None:
+        version_catalogo = version()
+    return f'W/"catalogo-{version_catalogo}"'
+
+
+async def etag_async() -> str:
+    return etag(await version_async())
+
+
+def registrar_cambio(session) -> None:
+    """
+    Incrementa la versión del catálogo dentro de la transacción de la escritura
+    (se confirma o se descarta junto con ella). Recibe una sesión sync; desde
+    una AsyncSession: await session.run_sync(catalogo.registrar_cambio).
+    """
+    resultado = session.execute(
+        update(CatalogoVersion)
+        .where(CatalogoVersion.id == 1)
+        .values(version=CatalogoVersion.version + 1)
+    )
+    if resultado.rowcount == 0:
+        # Base sin la fila inicial (la crea la migración m0006)
+        session.add(CatalogoVersion(id=1, version=1))
+
+
+def invalidar() -> None:
+    """Después del commit de una escritura: este worker relee la versión en el próximo request."""
+    global _leida
+    with _version_lock:
+        _leida = float("-inf")
+
+
+def en_cache(clave: Hashable, calcular: Callable[[], Any]) -> Any:
+    valor = cache.get(clave, _FALTA)
+    if valor is _FALTA:
+        valor = calcular()
+        if valor is not None:
+            cache.set(clave, valor)
+    return valor
+
+
+def consulta_cursos():
+    """
+    Select base de cursos con el profesor y las categorías precargados.
+    Cada relación se resuelve con una sola consulta IN adicional.
+    """
+    return select(Curso).options(
+        selectinload(Curso.profesor),
+        selectinload(Curso.categoria),
+    )
+
+
+def curso_a_out(curso: Curso) -> CursoOut:
+    """Construye el CursoOut a partir de un curso con relaciones ya cargadas."""
+    profesor = curso.profesor
+    profesor_out = ProfesorOut(
+        id=profesor.id,
+        name=profesor.name,
+        profesion=profesor.profesion,
+        imagen_url=profesor.imagen_url,
+    ) if profesor else None
+
+    categorias_out = [CategoriaOut(id=c.id, name=c.name) for c in curso.categoria]
+
+    # Si el nivel llega como Enum, usamos su valor
+    nivel = curso.nivel.value if hasattr(curso.nivel, "value") else curso.nivel
+
+    return CursoOut(
+        id=curso.id,
+        titulo=curso.titulo,
+        descripcion=curso.descripcion,
+        duracion=curso.duracion,
+        precio=curso.precio,
+        nivel=nivel,
+        destacado=curso.destacado,
+        imagen_url=curso.imagen_url,
+        profesor=profesor_out,
+        categorias=categorias_out,
+    )
+
+
+def parsear_campos(fields: Optional[str], include: Optional[str]) -> Optional[CursoCampos]:
+    """
+    Interpreta ?fields= y ?include=. Sin ninguno de los dos devuelve None (respuesta completa).
+    Con fields solo se devuelven las columnas listadas (el id siempre) y las relaciones que
+    aparezcan en fields o en include; con solo include, todas las columnas.
+    Lanza ValueError ante nombres desconocidos.
+    """
+    if fields is None and include is None:
+        return None
+    pedidos = [f.strip() for f in (fields or "").split(",") if f.strip()]
+    incluidos = [r.strip() for r in (include or "").split(",") if r.strip()]
+
+    desconocidos = [f for f in pedidos if f not in COLUMNAS and f not in RELACIONES]
+    desconocidos += [r for r in incluidos if r not in RELACIONES]
+    if desconocidos:
+        raise ValueError(f"Campos desconocidos: {', '.join(desconocidos)}")
+
+    if fields is None:
+        columnas = list(COLUMNAS)
+    else:
+        columnas = [c for c in COLUMNAS if c == "id" or c in pedidos]
+    relaciones = [r for r in RELACIONES if r in pedidos or r in incluidos]
+    return CursoCampos(columnas=columnas, relaciones=relaciones)
+
+
+def _clave_campos(campos: Optional[CursoCampos]):
+    return None if campos is None else (tuple(campos.columnas), tuple(campos.relaciones))
+
+
+def consulta(campos: Optional[CursoCampos] = None, extra_columnas: Sequence[str] = ()):
+    """
+    Select de cursos para los campos pedidos. Sin campos equivale a consulta_cursos().
+    extra_columnas agrega columnas necesarias para la consulta (p. ej. la del orden).
+    """
+    if campos is None:
+        return consulta_cursos()
+    nombres = set(campos.columnas) | set(extra_columnas)
+    if "profesor" in campos.relaciones:
+        nombres.add("profesor_id")
+    opciones = [load_only(*(getattr(Curso, n) for n in sorted(nombres)))]
+    if "profesor" in campos.relaciones:
+        opciones.append(selectinload(Curso.profesor))
+    if "categorias" in campos.relaciones:
+        opciones.append(selectinload(Curso.categoria))
+    return select(Curso).options(*opciones)
+
+
+def curso_a_dict(curso: Curso, campos: CursoCampos) -> dict:
+    datos = {c: getattr(curso, c) for c in campos.columnas}
+    if "nivel" in datos and hasattr(datos["nivel"], "value"):
+        datos["nivel"] = datos["nivel"].value
+    if "profesor" in campos.relaciones:
+        profesor = curso.profesor
+        datos["profesor"] = ProfesorOut(
+            id=profesor.id,
+            name=profesor.name,
+            profesion=profesor.profesion,
+            imagen_url=profesor.imagen_url,
+        ).model_dump() if profesor else None
+    if "categorias" in campos.relaciones:
+        datos["categorias"] = [{"id": c.id, "name": c.name} for c in curso.categoria]
+    return datos
+
+
+def serializar(cursos: Sequence[Curso], campos: Optional[CursoCampos] = None) -> List[dict]:
+    if campos is None:
+        return [curso_a_out(curso).model_dump() for curso in cursos]
+    return [curso_a_dict(curso, campos) for curso in cursos]
+
+
+def listar_destacados(session: Session, campos: Optional[CursoCampos] = None) -> List[dict]:
+    stmt = consulta(campos).where(Curso.destacado == True).order_by(Curso.id)
+    clave = ("destacados", _clave_campos(campos))
+    return en_cache(clave, lambda: serializar(session.exec(stmt).all(), campos))
+
+
+def obtener(session: Session, curso_id: int, campos: Optional[CursoCampos] = None) -> Optional[dict]:
+    def calcular():
+        curso = session.exec(consulta(campos).where(Curso.id == curso_id)).first()
+        return serializar([curso], campos)[0] if curso else None
+
+    return en_cache(("curso", curso_id, _clave_campos(campos)), calcular)
+
+
+def listar_por_ids(
+    session: Session, curso_ids: Sequence[int], campos: Optional[CursoCampos] = None
+) -> List[dict]:
+    """Cursos pedidos en el mismo orden que curso_ids (los inexistentes se omiten)."""
+    cursos = session.exec(consulta(campos).where(Curso.id.in_(curso_ids))).all()
+    por_id = {curso.id: curso for curso in cursos}
+    return serializar([por_id[i] for i in curso_ids if i in por_id], campos)
+
+
+def listar_por_profesor(
+    session: Session, profesor_id: int, campos: Optional[CursoCampos] = None
+) -> List[dict]:
+    stmt = consulta(campos).where(Curso.profesor_id == profesor_id).order_by(Curso.id)
+    clave = ("profesor", profesor_id, _clave_campos(campos))
+    return en_cache(clave, lambda: serializar(session.exec(stmt).all(), campos))
+
+
+def listar_por_categoria(
+    session: Session, categoria_id: int, campos: Optional[CursoCampos] = None
+) -> List[dict]:
+    stmt = (
+        consulta(campos)
+        .join(CursoCategoria, CursoCategoria.curso_id == Curso.id)
+        .where(CursoCategoria.categoria_id == categoria_id)
+        .order_by(Curso.id)
+    )
+    clave = ("categoria", categoria_id, _clave_campos(campos))
+    return en_cache(clave, lambda: serializar(session.exec(stmt).all(), campos))
+
+
+def exportar_ndjson(tamano_lote: int = 500) -> Iterator[bytes]:
+    """
+    Recorre todo el catálogo con un cursor del lado del servidor (yield_per) y
+    devuelve un CursoOut por línea, un bloque por cada lote de cursos.
+    Abre su propia sesión porque se consume después de terminar el handler.
+    """
+    with read_session() as session:
+        stmt = consulta_cursos().order_by(Curso.id).execution_options(yield_per=tamano_lote)
+        for lote in session.exec(stmt).partitions():
+            yield b"".join(
+                curso_a_out(curso).model_dump_json().encode() + b"\n" for curso in lote
+            )
+
+
+def aplicar_filtros(stmt, filtros: CursoFiltros):
+    """Agrega al select las condiciones de los filtros que vengan informados."""
+    if filtros.nivel is not None:
+        stmt = stmt.where(Curso.nivel == filtros.nivel)
+    if filtros.destacado is not None:
+        stmt = stmt.where(Curso.destacado == filtros.destacado)
+    if filtros.profesor_id is not None:
+        stmt = stmt.where(Curso.profesor_id == filtros.profesor_id)
+    if filtros.categoria_id is not None:
+        stmt = stmt.where(
+            Curso.id.in_(
+                select(CursoCategoria.curso_id)
+                .where(CursoCategoria.categoria_id == filtros.categoria_id)
+            )
+        )
+    if filtros.precio_min is not None:
+        stmt = stmt.where(Curso.precio >= filtros.precio_min)
+    if filtros.precio_max is not None:
+        stmt = stmt.where(Curso.precio <= filtros.precio_max)
+    if filtros.duracion_min is not None:
+        stmt = stmt.where(Curso.duracion >= filtros.duracion_min)
+    if filtros.duracion_max is not None:
+        stmt = stmt.where(Curso.duracion <= filtros.duracion_max)
+    return stmt
+
+
+def codificar_cursor(orden: str, direccion: str, valor, curso_id: int) -> str:
+    crudo = json.dumps([orden, direccion, valor, curso_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(crudo.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str, orden: str, direccion: str) -> Tuple[object, int]:
+    """
+    Devuelve (valor, id) del último curso de la página anterior.
+    Lanza ValueError si el cursor está mal formado o no corresponde al orden pedido.
+    """
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        cursor_orden, cursor_direccion, valor, curso_id = datos
+        curso_id = int(curso_id)
+    except (ValueError, TypeError):
+        raise ValueError("Cursor inválido")
+    if cursor_orden != orden or cursor_direccion != direccion:
+        raise ValueError("El cursor no corresponde al orden solicitado")
+    tipo_esperado = str if orden == "titulo" else (int, float)
+    if isinstance(valor, bool) or not isinstance(valor, tipo_esperado):
+        raise ValueError("Cursor inválido")
+    return valor, curso_id
+
+
+def paginar(
+    session: Session,
+    filtros: CursoFiltros,
+    orden: str = "id",
+    direccion: str = "asc",
+    limit: int = LIMITE_POR_DEFECTO,
+    cursor: Optional[str] = None,
+    campos: Optional[CursoCampos] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Página de cursos con paginación por keyset (sin OFFSET).
+    El orden es (columna, id), de modo que es estable aunque haya valores repetidos.
+    Devuelve los cursos y el cursor de la página siguiente (None si no hay más).
+    """
+    clave = (
+        "listado",
+        tuple(filtros.model_dump().items()),
+        orden,
+        direccion,
+        limit,
+        cursor,
+        _clave_campos(campos),
+    )
+    pagina = cache.get(clave)
+    if pagina is not None:
+        return pagina["cursos"], pagina["siguiente"]
+
+    columna = ORDEN_COLUMNAS[orden]
+    descendente = direccion == "desc"
+
+    stmt = aplicar_filtros(consulta(campos, extra_columnas=[orden]), filtros)
+
+    if cursor:
+        valor, ultimo_id = decodificar_cursor(cursor, orden, direccion)
+        if orden == "id":
+            stmt = stmt.where(Curso.id < ultimo_id if descendente else Curso.id > ultimo_id)
+        elif descendente:
+            stmt = stmt.where(or_(columna < valor, and_(columna == valor, Curso.id < ultimo_id)))
+        else:
+            stmt = stmt.where(or_(columna > valor, and_(columna == valor, Curso.id > ultimo_id)))
+
+    orden_sql = [columna] if orden == "id" else [columna, Curso.id]
+    stmt = stmt.order_by(*(c.desc() if descendente else c.asc() for c in orden_sql))
+
+    # Pedimos un curso de más para saber si existe una página siguiente
+    cursos = session.exec(stmt.limit(limit + 1)).all()
+    siguiente = None
+    if len(cursos) > limit:
+        cursos = cursos[:limit]
+        ultimo = cursos[-1]
+        siguiente = codificar_cursor(orden, direccion, getattr(ultimo, orden), ultimo.id)
+
+    pagina = {"cursos": serializar(cursos, campos), "siguiente": siguiente}
+    cache.set(clave, pagina)
+    return pagina["cursos"], siguiente
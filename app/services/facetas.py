@@ -0,0 +1,96 @@
+# app/services/facetas.py
+
+# Conteos por faceta del catálogo (nivel, categoría, profesor y rango de precio).
+# Todas las facetas salen de una única consulta UNION ALL sobre los cursos que
+# cumplen los filtros del listado; el resultado se cachea por combinación de filtros.
+
+from typing import Dict, List
+
+from sqlalchemy import String, case, cast, func, literal_column, union_all
+from sqlmodel import Session, select
+
+from app.models.categorias import Categoria
+from app.models.cursos import Curso
+from app.models.cursos_categorias import CursoCategoria
+from app.models.profesores import Profesor
+from app.schemas.cursos import CursoFacetas, CursoFiltros
+from app.services import catalogo
+
+# Límites de los rangos de precio; los cursos con precio 0 van a "gratis"
+LIMITES_PRECIO = [5000, 20000, 50000]
+
+
+def _rango_precio(precio):
+    tramos = [(precio <= 0, "gratis")]
+    inferior = 0
+    for limite in LIMITES_PRECIO:
+        tramos.append((precio < limite, f"{inferior}-{limite}"))
+        inferior = limite
+    return case(*tramos, else_=f"{inferior}+")
+
+
+def _constante(valor: str):
+    # Se escribe en el SQL (no como parámetro) para que el tipo quede definido en el UNION
+    return literal_column(f"'{valor}'", String)
+
+
+def consulta_facetas(filtros: CursoFiltros):
+    base = catalogo.aplicar_filtros(
+        select(
+            Curso.id,
+            Curso.nivel,
+            Curso.profesor_id,
+            _rango_precio(Curso.precio).label("rango_precio"),
+        ),
+        filtros,
+    ).cte("cursos_filtrados")
+
+    total = select(
+        _constante("total").label("faceta"),
+        _constante("total").label("clave"),
+        _constante("total").label("nombre"),
+        func.count().label("total"),
+    ).select_from(base)
+
+    nivel = select(
+        _constante("nivel"), base.c.nivel, base.c.nivel, func.count()
+    ).group_by(base.c.nivel)
+
+    categoria = (
+        select(_constante("categoria"), cast(Categoria.id, String), Categoria.name, func.count())
+        .select_from(base)
+        .join(CursoCategoria, CursoCategoria.curso_id == base.c.id)
+        .join(Categoria, Categoria.id == CursoCategoria.categoria_id)
+        .group_by(Categoria.id, Categoria.name)
+    )
+
+    profesor = (
+        select(_constante("profesor"), cast(Profesor.id, String), Profesor.name, func.count())
+        .select_from(base)
+        .join(Profesor, Profesor.id == base.c.profesor_id)
+        .group_by(Profesor.id, Profesor.name)
+    )
+
+    precio = select(
+        _constante("precio"), base.c.rango_precio, base.c.rango_precio, func.count()
+    ).group_by(base.c.rango_precio)
+
+    return union_all(total, nivel, categoria, profesor, precio)
+
+
+def calcular(session: Session, filtros: CursoFiltros) -> dict:
+    facetas: Dict[str, List[dict]] = {"nivel": [], "categoria": [], "profesor": [], "precio": []}
+    total = 0
+    for faceta, clave, nombre, cantidad in session.exec(consulta_facetas(filtros)).all():
+        if faceta == "total":
+            total = cantidad
+        else:
+            facetas[faceta].append({"clave": clave, "nombre": nombre, "total": cantidad})
+    for valores in facetas.values():
+        valores.sort(key=lambda v: (-v["total"], v["nombre"]))
+    return CursoFacetas(total=total, **facetas).model_dump()
+
+
+def obtener(session: Session, filtros: CursoFiltros) -> dict:
+    clave = ("facetas", tuple(filtros.model_dump().items()))
+    return catalogo.en_cache(clave, lambda: calcular(session, filtros))
@@ -0,0 +1,234 @@
+# app/services/importacion.py
+
+# Importación masiva de cursos desde un cuerpo CSV o NDJSON recibido en streaming.
+# Las filas se procesan por lotes: los profesores y categorías de cada lote se
+# resuelven con una consulta IN por tabla (recordando los ya vistos) y los
+# cursos, sus categorías y sus documentos de búsqueda se insertan en bloque,
+# con un commit por lote. Los errores se informan por el número de línea en el
+# que empieza la fila (en CSV un campo entre comillas puede ocupar varias).
+
+import codecs
+import csv
+import json
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, List, Tuple
+
+from fastapi import Request
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
+
+from app.models.categorias import Categoria
+from app.models.curso_busqueda import CursoBusqueda
+from app.models.cursos import Curso
+from app.models.cursos_categorias import CursoCategoria
+from app.models.profesores import Profesor
+from app.schemas.cursos import CursoImport
+from app.services import busqueda, catalogo, relacionados
+
+TAMANO_LOTE = 500
+MAX_ERRORES = 1000
+# Una fila CSV con más líneas que esto se descarta (comillas sin cerrar)
+MAX_LINEAS_FILA = 200
+
+FORMATOS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+
+def formato_de(content_type: str) -> str | None:
+    return FORMATOS.get(content_type.split(";")[0].strip().lower())
+
+
+async def _lineas(request: Request) -> AsyncIterator[Tuple[int, str]]:
+    """Líneas del cuerpo (numeradas desde 1) a medida que van llegando."""
+    decodificador = codecs.getincrementaldecoder("utf-8-sig")()
+    pendiente = ""
+    numero = 0
+    async for bloque in request.stream():
+        pendiente += decodificador.decode(bloque)
+        *completas, pendiente = pendiente.split("\n")
+        for linea in completas:
+            numero += 1
+            yield numero, linea.rstrip("\r")
+    pendiente += decodificador.decode(b"", final=True)
+    if pendiente:
+        yield numero + 1, pendiente.rstrip("\r")
+
+
+class Importacion:
+    def __init__(self, session: Session):
+        self.session = session
+        self.profesores: Dict[int, str] = {}
+        self.categorias: Dict[int, str] = {}
+        self.creados = 0
+        self.errores: List[dict] = []
+        self.errores_omitidos = 0
+
+    def error(self, linea: int, detalle) -> None:
+        if len(self.errores) < MAX_ERRORES:
+            self.errores.append({"linea": linea, "error": detalle})
+        else:
+            self.errores_omitidos += 1
+
+    def _resolver(self, modelo, conocidos: Dict[int, str], ids) -> None:
+        nuevos = set(ids) - conocidos.keys()
+        if nuevos:
+            filas = self.session.exec(select(modelo.id, modelo.name).where(modelo.id.in_(nuevos)))
+            conocidos.update(filas.all())
+
+    def procesar_lote(self, lote: List[Tuple[int, dict]]) -> None:
+        validas: List[Tuple[int, CursoImport]] = []
+        for linea, datos in lote:
+            try:
+                validas.append((linea, CursoImport.model_validate(datos)))
+            except ValidationError as e:
+                self.error(linea, e.errors(include_url=False, include_context=False, include_input=False))
+
+        self._resolver(Profesor, self.profesores, (d.profesor_id for _, d in validas))
+        self._resolver(Categoria, self.categorias, (c for _, d in validas for c in d.categorias_id))
+
+        filas: List[CursoImport] = []
+        for linea, datos in validas:
+            if datos.profesor_id not in self.profesores:
+                self.error(linea, f"Profesor con ID {datos.profesor_id} no existe")
+                continue
+            faltantes = [c for c in datos.categorias_id if c not in self.categorias]
+            if faltantes:
+                self.error(linea, f"Categorías inexistentes: {faltantes}")
+                continue
+            filas.append(datos)
+        if not filas:
+            return
+
+        cursos = [Curso(**d.model_dump(exclude={"categorias_id"})) for d in filas]
+        self.session.add_all(cursos)
+        self.session.flush()  # un INSERT por lote (insertmanyvalues) que devuelve los ids
+
+        enlaces = []
+        documentos = []
+        # El commit expira los Curso: lo que necesita el índice de relacionados
+        # se toma antes, para no recargar cada curso con un SELECT
+        vecinos = []
+        for curso, datos in zip(cursos, filas):
+            categorias_id = list(dict.fromkeys(datos.categorias_id))
+            enlaces.extend({"curso_id": curso.id, "categoria_id": c} for c in categorias_id)
+            partes = [curso.titulo, curso.descripcion]
+            partes += [self.categorias[c] for c in categorias_id]
+            partes.append(self.profesores[curso.profesor_id])
+            documentos.append({"curso_id": curso.id, "documento": " ".join(partes)})
+            vecinos.append((curso.id, curso.profesor_id, curso.nivel, categorias_id))
+        if enlaces:
+            self.session.execute(insert(CursoCategoria), enlaces)
+        self.session.execute(insert(CursoBusqueda), documentos)
+        catalogo.registrar_cambio(self.session)
+        self.session.commit()
+
+        if busqueda.indice.cargado:
+            for doc in documentos:
+                busqueda.indice.agregar(doc["curso_id"], doc["documento"])
+        for curso_id, profesor_id, nivel, categorias_id in vecinos:
+            relacionados.actualizar_curso(curso_id, profesor_id, nivel, categorias_id)
+        self.creados += len(cursos)
+
+    def resultado(self) -> dict:
+        return {
+            "creados": self.creados,
+            # Los errores de formato se registran al leer y los de validación al
+            # procesar el lote: se ordenan para informarlos por línea
+            "errores": sorted(self.errores, key=lambda e: e["linea"]),
+            "errores_omitidos": self.errores_omitidos,
+        }
+
+
+class _FaltanLineas(Exception):
+    """La fila CSV sigue en una línea que todavía no llegó."""
+
+
+async def _filas_csv(lineas: AsyncIterator[Tuple[int, str]], importacion: Importacion):
+    """Filas del CSV como diccionarios, con la línea en la que empieza cada una."""
+    pendientes: Deque[str] = deque()
+
+    def siguiente() -> str:
+        if not pendientes:
+            raise _FaltanLineas
+        return pendientes.popleft()
+
+    # Un solo lector para todo el cuerpo: recibe las líneas de la fila actual
+    # y, si un campo entre comillas sigue abierto, se vuelve a leer la fila
+    # desde el principio cuando llega la línea siguiente
+    lector = csv.reader(iter(siguiente, None))
+    encabezado = None
+    fila: List[str] = []
+    inicio = 0
+
+    async for linea, texto in lineas:
+        if not fila:
+            if not texto.strip():
+                continue
+            inicio = linea
+        fila.append(texto + "\n")
+        pendientes.clear()
+        pendientes.extend(fila)
+        try:
+            valores = next(lector)
+        except _FaltanLineas:
+            if len(fila) >= MAX_LINEAS_FILA:
+                importacion.error(inicio, "Campo entre comillas sin cerrar")
+                fila = []
+            continue
+        except csv.Error as e:
+            importacion.error(inicio, f"CSV inválido: {e}")
+            fila = []
+            continue
+        fila = []
+
+        if encabezado is None:
+            encabezado = [v.strip() for v in valores]
+            continue
+        if len(valores) != len(encabezado):
+            importacion.error(inicio, "Cantidad de columnas distinta a la del encabezado")
+            continue
+        yield inicio, dict(zip(encabezado, valores))
+
+    if fila:
+        importacion.error(inicio, "Campo entre comillas sin cerrar")
+
+
+async def _filas_ndjson(lineas: AsyncIterator[Tuple[int, str]], importacion: Importacion):
+    async for linea, texto in lineas:
+        if not texto.strip():
+            continue
+        try:
+            datos = json.loads(texto)
+        except ValueError:
+            importacion.error(linea, "JSON inválido")
+            continue
+        if not isinstance(datos, dict):
+            importacion.error(linea, "Se esperaba un objeto JSON")
+            continue
+        yield linea, datos
+
+
+async def importar(request: Request, session: Session, formato: str) -> dict:
+    importacion = Importacion(session)
+    lote: List[Tuple[int, dict]] = []
+    leer = _filas_csv if formato == "csv" else _filas_ndjson
+
+    async for linea, datos in leer(_lineas(request), importacion):
+        lote.append((linea, datos))
+        if len(lote) >= TAMANO_LOTE:
+            # El trabajo con la base es bloqueante: se hace fuera del event loop
+            await run_in_threadpool(importacion.procesar_lote, lote)
+            lote = []
+
+    if lote:
+        await run_in_threadpool(importacion.procesar_lote, lote)
+
+    if importacion.creados:
+        catalogo.invalidar()
+    return importacion.resultado()
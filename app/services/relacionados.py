@@ -0,0 +1,285 @@
+# app/services/relacionados.py
+
+# Índice de cursos relacionados.
+# La similitud entre dos cursos es el índice de Jaccard de sus categorías más un
+# bono si comparten profesor y otro (menor) si comparten nivel. Solo se calcula
+# para los pares que comparten al menos una categoría o el profesor, y de cada
+# curso se guardan solo sus K_MAX vecinos más parecidos (no toda la fila), así
+# que la memoria crece con n·K_MAX y no con los pares. Cuando cambia un curso se
+# recalcula su lista y se lo ofrece a la lista de sus candidatos; cada consulta
+# es una lectura de la lista ya ordenada.
+#
+# Los otros workers no ven nuestras escrituras: un hilo de fondo reconstruye el
+# índice desde la base cada RECONSTRUIR_CADA segundos (si cambió la versión del
+# catálogo) y lo reemplaza de una vez, sin frenar las consultas.
+
+import heapq
+import logging
+import threading
+import time
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from sqlmodel import Session, select
+
+from app.db import database
+from app.models.cursos import Curso
+from app.models.cursos_categorias import CursoCategoria
+from app.services import catalogo
+
+PESO_PROFESOR = 0.3
+PESO_NIVEL = 0.1
+K_MAX = 20
+RECONSTRUIR_CADA = 600  # segundos
+
+logger = logging.getLogger(__name__)
+
+# (puntaje, -curso_id): ordenadas de mayor a menor, a igual puntaje primero el id menor
+Vecino = Tuple[float, int]
+
+
+class IndiceRelacionados:
+    def __init__(self):
+        self._categorias: Dict[int, FrozenSet[int]] = {}
+        self._profesor: Dict[int, Optional[int]] = {}
+        self._nivel: Dict[int, str] = {}
+        self._por_categoria: Dict[int, Set[int]] = {}
+        self._por_profesor: Dict[int, Set[int]] = {}
+        self._vecinos: Dict[int, List[Vecino]] = {}
+        self._citado_por: Dict[int, Set[int]] = {}  # cursos en cuya lista aparece cada curso
+        self._diario: Optional[list] = None  # cambios recibidos durante una reconstrucción
+        self._lock = threading.RLock()
+        self.cargado_en: Optional[float] = None
+        self.version: Optional[int] = None  # versión del catálogo con la que se construyó
+
+    @property
+    def cargado(self) -> bool:
+        return self.cargado_en is not None
+
+    def _puntaje(self, a: int, b: int) -> float:
+        cats_a, cats_b = self._categorias[a], self._categorias[b]
+        union = len(cats_a | cats_b)
+        puntaje = len(cats_a & cats_b) / union if union else 0.0
+        if self._profesor[a] is not None and self._profesor[a] == self._profesor[b]:
+            puntaje += PESO_PROFESOR
+        if self._nivel[a] == self._nivel[b]:
+            puntaje += PESO_NIVEL
+        return puntaje
+
+    def _candidatos(self, curso_id: int) -> Set[int]:
+        candidatos: Set[int] = set()
+        for categoria_id in self._categorias[curso_id]:
+            candidatos |= self._por_categoria.get(categoria_id, set())
+        candidatos |= self._por_profesor.get(self._profesor[curso_id], set())
+        candidatos.discard(curso_id)
+        return candidatos
+
+    def _fijar_vecinos(self, curso_id: int, vecinos: List[Vecino]) -> None:
+        for _, otro in self._vecinos.get(curso_id, ()):
+            self._citado_por[-otro].discard(curso_id)
+        self._vecinos[curso_id] = vecinos
+        for _, otro in vecinos:
+            self._citado_por.setdefault(-otro, set()).add(curso_id)
+
+    def _calcular_vecinos(self, curso_id: int) -> List[Vecino]:
+        """Puntajes contra todos los candidatos; guarda los K_MAX mejores."""
+        puntajes = [(self._puntaje(curso_id, otro), -otro) for otro in self._candidatos(curso_id)]
+        self._fijar_vecinos(curso_id, heapq.nlargest(K_MAX, puntajes))
+        return puntajes
+
+    def _ofrecer(self, curso_id: int, vecino: Vecino) -> None:
+        """Agrega `vecino` a la lista de `curso_id` si entra entre los K_MAX mejores."""
+        lista = self._vecinos.setdefault(curso_id, [])
+        if len(lista) >= K_MAX and vecino <= lista[-1]:
+            return
+        lista.append(vecino)
+        lista.sort(reverse=True)
+        self._citado_por.setdefault(-vecino[1], set()).add(curso_id)
+        if len(lista) > K_MAX:
+            _, sale = lista.pop()
+            self._citado_por[-sale].discard(curso_id)
+
+    def _quitar(self, curso_id: int) -> None:
+        self._fijar_vecinos(curso_id, [])
+        del self._vecinos[curso_id]
+        for categoria_id in self._categorias.pop(curso_id, ()):
+            self._por_categoria[categoria_id].discard(curso_id)
+        profesor_id = self._profesor.pop(curso_id, None)
+        if profesor_id is not None:
+            self._por_profesor[profesor_id].discard(curso_id)
+        self._nivel.pop(curso_id, None)
+        # Las listas donde estaba: si estaban completas puede entrar otro curso
+        for otro in self._citado_por.pop(curso_id, ()):
+            lista = self._vecinos[otro]
+            completa = len(lista) >= K_MAX
+            lista.remove(next(v for v in lista if v[1] == -curso_id))
+            if completa:
+                self._calcular_vecinos(otro)
+
+    def _agregar(self, curso_id: int, profesor_id: Optional[int], nivel: str, categorias: Iterable[int]) -> None:
+        self._categorias[curso_id] = frozenset(categorias)
+        self._profesor[curso_id] = profesor_id
+        self._nivel[curso_id] = nivel
+        for categoria_id in self._categorias[curso_id]:
+            self._por_categoria.setdefault(categoria_id, set()).add(curso_id)
+        if profesor_id is not None:
+            self._por_profesor.setdefault(profesor_id, set()).add(curso_id)
+
+    def _actualizar(self, curso_id: int, profesor_id: Optional[int], nivel: str, categorias: Iterable[int]) -> None:
+        if curso_id in self._categorias:
+            self._quitar(curso_id)
+        self._agregar(curso_id, profesor_id, nivel, categorias)
+        for puntaje, otro in self._calcular_vecinos(curso_id):
+            self._ofrecer(-otro, (puntaje, -curso_id))
+
+    def _anotar(self, metodo: str, *args) -> None:
+        if self._diario is not None:
+            self._diario.append((metodo, args))
+
+    def actualizar(self, curso_id: int, profesor_id: Optional[int], nivel: str, categorias: Iterable[int]) -> None:
+        """Agrega o actualiza un curso y recalcula solo las listas en las que participa."""
+        categorias = frozenset(categorias)
+        with self._lock:
+            self._anotar("actualizar", curso_id, profesor_id, nivel, categorias)
+            self._actualizar(curso_id, profesor_id, nivel, categorias)
+
+    def quitar(self, curso_id: int) -> None:
+        with self._lock:
+            self._anotar("quitar", curso_id)
+            if curso_id in self._categorias:
+                self._quitar(curso_id)
+
+    def quitar_categoria(self, categoria_id: int) -> None:
+        with self._lock:
+            self._anotar("quitar_categoria", categoria_id)
+            for curso_id in list(self._por_categoria.get(categoria_id, ())):
+                self._actualizar(
+                    curso_id,
+                    self._profesor[curso_id],
+                    self._nivel[curso_id],
+                    self._categorias[curso_id] - {categoria_id},
+                )
+            self._por_categoria.pop(categoria_id, None)
+
+    def relacionados(self, curso_id: int, k: int) -> List[int]:
+        with self._lock:
+            return [-otro for _, otro in self._vecinos.get(curso_id, ())[:k]]
+
+    def reconstruir(self, session: Session) -> None:
+        """
+        Arma un índice nuevo desde la base, fuera del lock, y lo reemplaza de una vez.
+        Los cambios que llegan mientras tanto se anotan y se repiten sobre el nuevo.
+        """
+        with self._lock:
+            self._diario = []
+        try:
+            version = catalogo.version()
+            cursos = session.exec(select(Curso.id, Curso.profesor_id, Curso.nivel)).all()
+            enlaces = session.exec(select(CursoCategoria.curso_id, CursoCategoria.categoria_id)).all()
+            categorias: Dict[int, List[int]] = {}
+            for curso_id, categoria_id in enlaces:
+                categorias.setdefault(curso_id, []).append(categoria_id)
+
+            nuevo = IndiceRelacionados()
+            for curso_id, profesor_id, nivel in cursos:
+                nuevo._agregar(curso_id, profesor_id, _nivel(nivel), categorias.get(curso_id, ()))
+            for curso_id, _, _ in cursos:
+                nuevo._calcular_vecinos(curso_id)
+
+            with self._lock:
+                for metodo, args in self._diario:
+                    getattr(nuevo, metodo)(*args)
+                self._categorias = nuevo._categorias
+                self._profesor = nuevo._profesor
+                self._nivel = nuevo._nivel
+                self._por_categoria = nuevo._por_categoria
+                self._por_profesor = nuevo._por_profesor
+                self._vecinos = nuevo._vecinos
+                self._citado_por = nuevo._citado_por
+                self.version = version
+                self.cargado_en = time.monotonic()
+        finally:
+            with self._lock:
+                self._diario = None
+
+
+def _nivel(nivel) -> str:
+    return nivel.value if hasattr(nivel, "value") else nivel
+
+
+indice = IndiceRelacionados()
+_carga_lock = threading.Lock()
+_detener = threading.Event()
+_hilo: Optional[threading.Thread] = None
+
+
+def _asegurar(session: Session) -> None:
+    # Solo la primera vez; después lo mantiene el hilo de fondo
+    if indice.cargado:
+        return
+    with _carga_lock:
+        if not indice.cargado:
+            indice.reconstruir(session)
+
+
+def relacionados(session: Session, curso_id: int, k: int) -> List[int]:
+    _asegurar(session)
+    return indice.relacionados(curso_id, k)
+
+
+def _reconstruir() -> None:
+    with _carga_lock:
+        with Session(database.engine) as session:
+            indice.reconstruir(session)
+
+
+def _en_segundo_plano(forzar: bool = False) -> None:
+    try:
+        if indice.cargado and (forzar or catalogo.version() != indice.version):
+            _reconstruir()
+    except Exception:
+        logger.exception("No se pudo reconstruir el índice de relacionados")
+
+
+def _bucle() -> None:
+    while not _detener.wait(RECONSTRUIR_CADA):
+        _en_segundo_plano()
+
+
+def iniciar() -> None:
+    """Arranca el hilo que reconstruye el índice periódicamente (startup de la app)."""
+    global _hilo
+    _detener.clear()
+    _hilo = threading.Thread(target=_bucle, name="relacionados", daemon=True)
+    _hilo.start()
+
+
+def detener() -> None:
+    _detener.set()
+    if _hilo is not None:
+        _hilo.join()
+
+
+# --- Mantenimiento (se llama desde los handlers, después del commit) ---
+
+def actualizar(curso: Curso, categorias_ids: Iterable[int]) -> None:
+    actualizar_curso(curso.id, curso.profesor_id, curso.nivel, categorias_ids)
+
+
+def actualizar_curso(curso_id: int, profesor_id: Optional[int], nivel, categorias_ids: Iterable[int]) -> None:
+    if indice.cargado:
+        indice.actualizar(curso_id, profesor_id, _nivel(nivel), categorias_ids)
+
+
+def quitar(curso_id: int) -> None:
+    if indice.cargado:
+        indice.quitar(curso_id)
+
+
+def quitar_categoria(categoria_id: int) -> None:
+    if indice.cargado:
+        indice.quitar_categoria(categoria_id)
+
+
+def descartar() -> None:
+    """Reconstruye el índice completo en segundo plano; mientras tanto sigue el actual."""
+    threading.Thread(target=_en_segundo_plano, args=(True,), name="relacionados", daemon=True).start()
@@ -0,0 +1,135 @@
+# app/services/snapshot.py
+
+# Snapshot del catálogo público ya codificado en JSON.
+# Se construye una sola vez por versión del catálogo (ver catalogo.registrar_cambio),
+# que es compartida por todos los workers, y como mucho dura CATALOGO_CACHE_TTL
+# segundos, igual que las entradas de la caché. Los handlers devuelven
+# directamente sus bytes, sin crear CursoOut ni pasar por la
+# validación/serialización de response_model.
+# El listado completo y los destacados se guardan además comprimidos (gzip y,
+# si está instalada la librería brotli, br).
+
+import bisect
+import gzip
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Request, Response
+from sqlmodel import Session
+
+from app.config import settings
+from app.db import database
+from app.models.cursos import Curso
+from app.services import catalogo
+
+try:
+    import brotli  # opcional: pip install brotli
+except ImportError:
+    brotli = None
+
+
+@dataclass
+class Variantes:
+    identity: bytes
+    gzip: Optional[bytes] = None
+    br: Optional[bytes] = None
+
+    @classmethod
+    def comprimir(cls, cuerpo: bytes) -> "Variantes":
+        return cls(
+            identity=cuerpo,
+            gzip=gzip.compress(cuerpo, compresslevel=6),
+            br=brotli.compress(cuerpo) if brotli else None,
+        )
+
+    def elegir(self, accept_encoding: str) -> Tuple[bytes, Optional[str]]:
+        aceptadas = {c.split(";")[0].strip().lower() for c in accept_encoding.split(",")}
+        if self.br is not None and "br" in aceptadas:
+            return self.br, "br"
+        if self.gzip is not None and "gzip" in aceptadas:
+            return self.gzip, "gzip"
+        return self.identity, None
+
+
+def _lista(cuerpos: List[bytes]) -> bytes:
+    return b"[" + b",".join(cuerpos) + b"]"
+
+
+class Snapshot:
+    def __init__(self, version: int, cursos: List[Curso]):
+        self.version = version
+        self.creado = time.monotonic()
+        self.ids: List[int] = [c.id for c in cursos]
+        self.cursos: Dict[int, bytes] = {
+            c.id: catalogo.curso_a_out(c).model_dump_json().encode() for c in cursos
+        }
+        self.destacados = Variantes.comprimir(
+            _lista([self.cursos[c.id] for c in cursos if c.destacado])
+        )
+        primera, self.siguiente = self._pagina(0, catalogo.LIMITE_POR_DEFECTO)
+        self.primera_pagina = Variantes.comprimir(primera.identity)
+
+    def _pagina(self, inicio: int, limit: int) -> Tuple[Variantes, Optional[str]]:
+        ids = self.ids[inicio:inicio + limit]
+        siguiente = None
+        if inicio + limit < len(self.ids):
+            siguiente = catalogo.codificar_cursor("id", "asc", ids[-1], ids[-1])
+        return Variantes(_lista([self.cursos[i] for i in ids])), siguiente
+
+    def pagina(self, limit: int, cursor: Optional[str]) -> Tuple[Variantes, Optional[str]]:
+        """Página del listado sin filtros ordenado por id (mismo cursor que catalogo.paginar)."""
+        if cursor is None:
+            if limit == catalogo.LIMITE_POR_DEFECTO:
+                return self.primera_pagina, self.siguiente
+            return self._pagina(0, limit)
+        _, ultimo_id = catalogo.decodificar_cursor(cursor, "id", "asc")
+        return self._pagina(bisect.bisect_right(self.ids, ultimo_id), limit)
+
+    def vigente(self, version: int) -> bool:
+        return self.version == version and time.monotonic() - self.creado < settings.CATALOGO_CACHE_TTL
+
+    def curso(self, curso_id: int) -> Optional[bytes]:
+        return self.cursos.get(curso_id)
+
+    def lista(self, curso_ids: List[int]) -> bytes:
+        """Lista JSON con los cursos pedidos, en el mismo orden (ignora ids inexistentes)."""
+        return _lista([self.cursos[i] for i in curso_ids if i in self.cursos])
+
+
+_actual: Optional[Snapshot] = None
+_lock = threading.Lock()
+
+
+def actual() -> Snapshot:
+    """Devuelve el snapshot vigente, reconstruyéndolo si el catálogo cambió o venció."""
+    global _actual
+    snap = _actual
+    if snap is not None and snap.vigente(catalogo.version()):
+        return snap
+    with _lock:
+        # Otro request pudo haberlo reconstruido mientras esperábamos el lock
+        version = catalogo.version()
+        if _actual is None or not _actual.vigente(version):
+            # De la primaria: una réplica atrasada dejaría datos viejos con la versión nueva
+            with Session(database.engine) as session:
+                cursos = session.exec(catalogo.consulta_cursos().order_by(Curso.id)).all()
+                _actual = Snapshot(version, cursos)
+        return _actual
+
+
+def responder(
+    request: Request,
+    snap: Snapshot,
+    variantes: Variantes,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    cuerpo, encoding = variantes.elegir(request.headers.get("accept-encoding", ""))
+    headers = dict(headers or {})
+    headers["ETag"] = catalogo.etag(snap.version)
+    headers["Cache-Control"] = "no-cache"
+    headers["Vary"] = "Accept-Encoding"
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=cuerpo, media_type="application/json", headers=headers)
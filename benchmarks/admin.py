@@ -0,0 +1,84 @@
+# benchmarks/admin.py
+
+# Latencia de una ruta de administración según cómo se autoriza el request.
+# Corre la app en el mismo proceso (sin red, contra la base de DATABASE_URL) y
+# mide la misma ruta con tres variantes:
+#
+#   sin claims, sin caché   token solo con "sub" y cachés vacías: se lee el usuario en cada request
+#   sin claims, con caché   token solo con "sub": el usuario sale de la caché de auth
+#   claims rol + ver        token de login: require_admin usa los claims firmados
+#
+#   python benchmarks/admin.py --user-id 1 --ruta /admin/cache/catalogo --requests 2000
+#
+# El usuario tiene que ser admin o superadmin.
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import Callable, List
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import Session  # noqa: E402
+
+from app.auth import auth  # noqa: E402
+from app.db.database import engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.users import User  # noqa: E402
+
+
+async def medir(cliente: httpx.AsyncClient, ruta: str, token: str, total: int, antes: Callable[[], None]) -> List[float]:
+    headers = {"Authorization": f"Bearer {token}"}
+    r = await cliente.get(ruta, headers=headers)  # calentamiento
+    r.raise_for_status()
+    latencias = []
+    for _ in range(total):
+        antes()
+        inicio = time.perf_counter()
+        r = await cliente.get(ruta, headers=headers)
+        latencias.append(time.perf_counter() - inicio)
+        r.raise_for_status()
+    return latencias
+
+
+def _vaciar_caches() -> None:
+    auth.usuarios_cache.clear()
+    auth.versiones_cache.clear()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Latencia de rutas de administración según el token")
+    parser.add_argument("--user-id", type=int, required=True, help="Id de un usuario admin")
+    parser.add_argument("--ruta", default="/admin/cache/catalogo")
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        user = session.get(User, args.user_id)
+        if user is None or user.role not in auth.ROLES_ADMIN:
+            raise SystemExit(f"El usuario {args.user_id} no existe o no es admin")
+        con_claims = auth.token_usuario(user)
+    sin_claims = auth.create_access_token({"sub": str(args.user_id)})
+
+    variantes = [
+        ("sin claims, sin caché", sin_claims, _vaciar_caches),
+        ("sin claims, con caché", sin_claims, lambda: None),
+        ("claims rol + ver", con_claims, lambda: None),
+    ]
+    transporte = httpx.ASGITransport(app=app)
+    print(f"{'variante':<24} {'p50 ms':>9} {'p95 ms':>9} {'media ms':>9}")
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        for nombre, token, antes in variantes:
+            latencias = await medir(cliente, args.ruta, token, args.requests, antes)
+            cuantiles = statistics.quantiles(latencias, n=100)
+            print(f"{nombre:<24} {cuantiles[49] * 1000:>9.3f} {cuantiles[94] * 1000:>9.3f} "
+                  f"{statistics.mean(latencias) * 1000:>9.3f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
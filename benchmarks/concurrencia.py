@@ -0,0 +1,78 @@
+# benchmarks/concurrencia.py
+
+# Mide cómo escala la API con la cantidad de requests simultáneos.
+# Con la API corriendo (uvicorn app.main:app) ejecutar, por ejemplo:
+#
+#   python benchmarks/concurrencia.py --url http://localhost:8000 \
+#       --ruta /categorias/ --ruta /profesores/1 --concurrencia 1,10,50,100
+#
+# Para comparar antes/después se corre el mismo comando sobre cada versión del
+# código. Si un endpoint bloquea el event loop, las requests/s dejan de crecer
+# con la concurrencia y la latencia p95 crece linealmente.
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List, Tuple
+
+import httpx
+
+
+async def _trabajador(cliente: httpx.AsyncClient, ruta: str, cola: asyncio.Queue, latencias: List[float], errores: List[int]):
+    while True:
+        try:
+            cola.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        inicio = time.perf_counter()
+        try:
+            r = await cliente.get(ruta)
+            if r.status_code >= 400:
+                errores.append(r.status_code)
+        except httpx.HTTPError:
+            errores.append(0)
+        latencias.append(time.perf_counter() - inicio)
+
+
+async def medir(url: str, ruta: str, concurrencia: int, total: int, headers: dict) -> Tuple[float, float, float, int]:
+    """Devuelve (requests/s, p50 ms, p95 ms, errores)."""
+    cola: asyncio.Queue = asyncio.Queue()
+    for _ in range(total):
+        cola.put_nowait(None)
+    latencias: List[float] = []
+    errores: List[int] = []
+    limites = httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia)
+    async with httpx.AsyncClient(base_url=url, headers=headers, limits=limites, timeout=60) as cliente:
+        await cliente.get(ruta)  # calentamiento
+        inicio = time.perf_counter()
+        await asyncio.gather(*(
+            _trabajador(cliente, ruta, cola, latencias, errores) for _ in range(concurrencia)
+        ))
+        duracion = time.perf_counter() - inicio
+    cuantiles = statistics.quantiles(latencias, n=100)
+    return total / duracion, cuantiles[49] * 1000, cuantiles[94] * 1000, len(errores)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark de concurrencia de la API")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--ruta", action="append", help="Ruta a medir (se puede repetir)")
+    parser.add_argument("--concurrencia", default="1,10,50,100", help="Niveles separados por coma")
+    parser.add_argument("--requests", type=int, default=500, help="Requests por nivel")
+    parser.add_argument("--token", help="Token JWT para rutas protegidas")
+    args = parser.parse_args()
+
+    rutas = args.ruta or ["/categorias/", "/profesores/"]
+    niveles = [int(n) for n in args.concurrencia.split(",")]
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+
+    print(f"{'ruta':<30} {'conc':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'errores':>8}")
+    for ruta in rutas:
+        for nivel in niveles:
+            rps, p50, p95, errores = await medir(args.url, ruta, nivel, args.requests, headers)
+            print(f"{ruta:<30} {nivel:>5} {rps:>9.1f} {p50:>9.1f} {p95:>9.1f} {errores:>8}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
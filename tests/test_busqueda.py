@@ -0,0 +1,206 @@
+# tests/test_busqueda.py
+
+# Ranking BM25 del índice en memoria (el que se usa fuera de PostgreSQL) y
+# paridad con la búsqueda tsvector. La prueba de paridad necesita una base
+# PostgreSQL vacía en TEST_DATABASE_URL; sin ella se omite.
+
+import os
+
+import pytest
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, select
+
+import app.models.user_payment  # noqa: F401  (User.payments)
+from app.models.categorias import Categoria
+from app.models.curso_busqueda import CursoBusqueda
+from app.models.cursos import Curso
+from app.models.cursos_categorias import CursoCategoria
+from app.models.profesores import Profesor
+from app.services import busqueda
+from app.services.busqueda import IndiceInvertido, tokenizar
+
+DOCUMENTOS = {
+    1: "Python desde cero Programación Ana Gómez",
+    2: "Python avanzado con FastAPI Programación Web Ana Gómez",
+    3: "Diseño web con HTML y CSS Diseño Web Luis Pérez",
+    4: "FastAPI práctico: APIs con Python y Python asíncrono Programación Luis Pérez",
+    5: "Fotografía digital para principiantes Arte Marta Ruiz",
+}
+
+
+def indice_con(documentos) -> IndiceInvertido:
+    indice = IndiceInvertido()
+    for curso_id, texto in documentos.items():
+        indice.agregar(curso_id, texto)
+    return indice
+
+
+# --- Índice en memoria ---
+
+def test_tokenizar_normaliza_y_quita_palabras_vacias():
+    assert tokenizar("Diseño Web con HTML y CSS") == ["diseno", "web", "html", "css"]
+
+
+def test_requiere_todos_los_terminos():
+    indice = indice_con(DOCUMENTOS)
+    assert set(indice.buscar("python fastapi", 10)) == {2, 4}
+    assert indice.buscar("python java", 10) == []
+
+
+def test_ignora_acentos_y_mayusculas():
+    indice = indice_con(DOCUMENTOS)
+    assert indice.buscar("DISENO", 10) == [3]
+    assert indice.buscar("fotografía", 10) == [5]
+
+
+def test_mas_apariciones_rankea_primero():
+    indice = indice_con({1: "python java go rust", 2: "python python java go"})
+    assert indice.buscar("python", 10) == [2, 1]
+
+
+def test_documento_mas_corto_rankea_primero():
+    indice = indice_con({1: "python " + "relleno " * 20, 2: "python relleno"})
+    assert indice.buscar("python", 10) == [2, 1]
+
+
+def test_empate_ordena_por_id():
+    indice = indice_con({3: "python fastapi", 1: "python fastapi", 2: "python fastapi"})
+    assert indice.buscar("python", 10) == [1, 2, 3]
+
+
+def test_paginacion():
+    indice = indice_con({i: "python" for i in range(1, 8)})
+    assert indice.buscar("python", 3) == [1, 2, 3]
+    assert indice.buscar("python", 3, offset=3) == [4, 5, 6]
+    assert indice.buscar("python", 3, offset=6) == [7]
+
+
+def test_consulta_sin_terminos():
+    indice = indice_con(DOCUMENTOS)
+    assert indice.buscar("de la y", 10) == []
+    assert indice.buscar("", 10) == []
+
+
+def test_agregar_reemplaza_y_quitar_borra():
+    indice = indice_con(DOCUMENTOS)
+    indice.agregar(5, "Python para fotógrafos")
+    assert indice.buscar("fotografia", 10) == []
+    assert 5 in indice.buscar("python", 10)
+    indice.quitar(5)
+    assert 5 not in indice.buscar("python", 10)
+    assert indice._longitud_total == sum(indice._longitudes.values())
+
+
+# --- Base ---
+
+def _cargar_documentos(conn) -> None:
+    conn.execute(insert(Profesor.__table__), [{"id": 1, "name": "Ana", "profesion": "Dev"}])
+    conn.execute(insert(Curso.__table__), [
+        {"id": i, "titulo": f"Curso {i}", "descripcion": "d", "duracion": 1, "precio": 1.0,
+         "nivel": "Básico", "destacado": False, "profesor_id": 1}
+        for i in DOCUMENTOS
+    ])
+    conn.execute(insert(CursoBusqueda.__table__), [
+        {"curso_id": i, "documento": texto} for i, texto in DOCUMENTOS.items()
+    ])
+
+
+TABLAS = [Profesor.__table__, Curso.__table__, CursoBusqueda.__table__]
+TABLAS_REINDEXAR = TABLAS + [Categoria.__table__, CursoCategoria.__table__]
+
+
+def _reindexar_profesor(session) -> tuple:
+    """Renombra al profesor 1 y reindexa sus cursos; devuelve (documentos, sentencias)."""
+    sentencias = []
+    escuchar = lambda conn, cursor, sql, *args: sentencias.append(sql)  # noqa: E731
+    conn = session.connection()
+    event.listen(conn.engine, "before_cursor_execute", escuchar)
+    try:
+        session.get(Profesor, 1).name = "Beatriz"
+        session.flush()
+        sentencias.clear()
+        busqueda.reindexar_profesor(session, 1)
+        session.flush()
+    finally:
+        event.remove(conn.engine, "before_cursor_execute", escuchar)
+    documentos = dict(session.exec(select(CursoBusqueda.curso_id, CursoBusqueda.documento)).all())
+    return documentos, sentencias
+
+
+def test_fuera_de_postgres_usa_el_indice_en_memoria(monkeypatch):
+    monkeypatch.setattr(busqueda, "indice", IndiceInvertido())
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine, tables=TABLAS)
+    with engine.begin() as conn:
+        _cargar_documentos(conn)
+
+    with Session(engine) as session:
+        assert busqueda.buscar(session, "python fastapi", 10) == indice_con(DOCUMENTOS).buscar("python fastapi", 10)
+    assert busqueda.indice.cargado
+
+
+def test_reindexar_escribe_los_documentos_en_bloque(monkeypatch):
+    monkeypatch.setattr(busqueda, "indice", IndiceInvertido())
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine, tables=TABLAS_REINDEXAR)
+    with engine.begin() as conn:
+        _cargar_documentos(conn)
+        # El curso 5 todavía no tiene documento
+        conn.execute(CursoBusqueda.__table__.delete().where(CursoBusqueda.curso_id == 5))
+
+    with Session(engine) as session:
+        documentos, sentencias = _reindexar_profesor(session)
+
+    assert documentos == {i: f"Curso {i} d Beatriz" for i in DOCUMENTOS}
+    # ids del profesor, cursos + profesor + categorías (selectin), documentos
+    # existentes, un UPDATE (executemany) y un INSERT: no depende de la cantidad de cursos
+    assert len(sentencias) == 7
+
+
+CONSULTAS_PARIDAD = ["python", "python fastapi", "web", "html css", "fotografía digital", "java", "programación ana"]
+
+
+@pytest.mark.skipif(not os.environ.get("TEST_DATABASE_URL"), reason="requiere TEST_DATABASE_URL (PostgreSQL)")
+@pytest.mark.parametrize("consulta", CONSULTAS_PARIDAD)
+def test_paridad_tsvector_y_bm25(consulta):
+    # Las consultas usan palabras sin variantes de plural ni género: el
+    # diccionario 'spanish' de PostgreSQL aplica stemming y el índice en memoria no
+    engine = create_engine(os.environ["TEST_DATABASE_URL"])
+    with engine.connect() as conn:
+        transaccion = conn.begin()
+        try:
+            SQLModel.metadata.create_all(conn, tables=TABLAS)
+            _cargar_documentos(conn)
+            with Session(bind=conn) as session:
+                postgres = busqueda.buscar(session, consulta, 10)
+        finally:
+            transaccion.rollback()
+    engine.dispose()
+
+    memoria = indice_con(DOCUMENTOS).buscar(consulta, 10)
+    assert set(postgres) == set(memoria)
+    if memoria:
+        assert postgres[0] == memoria[0]
+
+
+@pytest.mark.skipif(not os.environ.get("TEST_DATABASE_URL"), reason="requiere TEST_DATABASE_URL (PostgreSQL)")
+def test_reindexar_en_postgres_usa_un_upsert(monkeypatch):
+    monkeypatch.setattr(busqueda, "indice", IndiceInvertido())
+    engine = create_engine(os.environ["TEST_DATABASE_URL"])
+    with engine.connect() as conn:
+        transaccion = conn.begin()
+        try:
+            SQLModel.metadata.create_all(conn, tables=TABLAS_REINDEXAR)
+            _cargar_documentos(conn)
+            conn.execute(CursoBusqueda.__table__.delete().where(CursoBusqueda.curso_id == 5))
+            with Session(bind=conn) as session:
+                documentos, sentencias = _reindexar_profesor(session)
+        finally:
+            transaccion.rollback()
+    engine.dispose()
+
+    assert documentos == {i: f"Curso {i} d Beatriz" for i in DOCUMENTOS}
+    assert sum("ON CONFLICT" in s for s in sentencias) == 1
+    # ids del profesor, cursos + profesor + categorías (selectin) y el upsert
+    assert len(sentencias) == 5
@@ -0,0 +1,115 @@
+# tests/test_cursos_batch.py
+
+# GET y POST /cursos/batch: los cursos pedidos, en el orden pedido, con su
+# profesor y categorías, en una cantidad de consultas que no depende de
+# cuántos cursos se piden.
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel
+
+import app.models.user_payment  # noqa: F401  (User.payments)
+from app.db import database
+from app.db.database import get_read_session
+from app.models.categorias import Categoria
+from app.models.cursos import Curso
+from app.models.cursos_categorias import CursoCategoria
+from app.models.profesores import Profesor
+from app.router import cursos
+from app.services import catalogo, snapshot
+
+TABLAS = [Profesor.__table__, Categoria.__table__, Curso.__table__, CursoCategoria.__table__]
+N_CURSOS = 30
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine, tables=TABLAS)
+    with engine.begin() as conn:
+        conn.execute(insert(Profesor.__table__), [
+            {"id": p, "name": f"Profesor {p}", "profesion": "Dev"} for p in (1, 2)
+        ])
+        conn.execute(insert(Categoria.__table__), [
+            {"id": c, "name": f"Categoría {c}", "descripcion": "d"} for c in (1, 2, 3)
+        ])
+        conn.execute(insert(Curso.__table__), [
+            {"id": i, "titulo": f"Curso {i}", "descripcion": "d", "profesor_id": 1 + i % 2}
+            for i in range(1, N_CURSOS + 1)
+        ])
+        conn.execute(insert(CursoCategoria.__table__), [
+            {"curso_id": i, "categoria_id": c} for i in range(1, N_CURSOS + 1) for c in (1, 2, 3) if i % c == 0
+        ])
+
+    # El snapshot lee de database.engine; la versión del catálogo queda fija
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(catalogo, "version", lambda: 1)
+    monkeypatch.setattr(snapshot, "_actual", None)
+    catalogo.cache.clear()
+    return engine
+
+
+@pytest.fixture
+def cliente(engine):
+    app = FastAPI()
+    app.include_router(cursos.router, prefix="/cursos")
+
+    def sesion_de_prueba():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_read_session] = sesion_de_prueba
+    return TestClient(app)
+
+
+def contar_consultas(engine, hacer) -> tuple:
+    sentencias = []
+    escuchar = lambda conn, cursor, sql, *args: sentencias.append(sql)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", escuchar)
+    try:
+        resultado = hacer()
+    finally:
+        event.remove(engine, "before_cursor_execute", escuchar)
+    return resultado, len(sentencias)
+
+
+def test_get_devuelve_el_orden_pedido(cliente):
+    respuesta = cliente.get("/cursos/batch", params={"ids": "6,1,999,4,6"})
+    assert respuesta.status_code == 200
+    cursos_out = respuesta.json()
+    # Sin el inexistente ni el repetido
+    assert [c["id"] for c in cursos_out] == [6, 1, 4]
+    assert cursos_out[0]["profesor"]["name"] == "Profesor 1"
+    assert sorted(c["id"] for c in cursos_out[0]["categorias"]) == [1, 2, 3]
+    assert cursos_out[1]["categorias"] == [{"id": 1, "name": "Categoría 1"}]
+
+
+def test_post_igual_que_get(cliente):
+    por_get = cliente.get("/cursos/batch", params={"ids": "9,2,3"}).json()
+    por_post = cliente.post("/cursos/batch", json={"ids": [9, 2, 3]})
+    assert por_post.status_code == 200
+    assert por_post.json() == por_get
+
+
+def test_ids_invalidos(cliente):
+    assert cliente.get("/cursos/batch", params={"ids": "1,dos"}).status_code == 400
+    assert cliente.post("/cursos/batch", json={"ids": []}).status_code == 422
+    assert cliente.post("/cursos/batch", json={"ids": list(range(201))}).status_code == 422
+
+
+@pytest.mark.parametrize("parametros", [{}, {"fields": "id,titulo", "include": "profesor,categorias"}])
+def test_consultas_no_dependen_de_la_cantidad(cliente, engine, parametros):
+    def pedir(ids):
+        snapshot._actual = None  # sin ?fields= se arma el snapshot
+        return cliente.get("/cursos/batch", params={"ids": ",".join(map(str, ids)), **parametros})
+
+    uno, consultas_uno = contar_consultas(engine, lambda: pedir([1]))
+    todos, consultas_todos = contar_consultas(engine, lambda: pedir(range(1, N_CURSOS + 1)))
+
+    assert len(uno.json()) == 1
+    assert len(todos.json()) == N_CURSOS
+    # Cursos, profesores y categorías: una consulta cada uno
+    assert consultas_uno == consultas_todos == 3
@@ -0,0 +1,138 @@
+# tests/test_importacion.py
+
+# Importación en streaming (CSV y NDJSON) contra SQLite en memoria: errores por
+# fila con su número de línea y campos CSV entre comillas con saltos de línea.
+
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, select
+
+import app.models.user_payment  # noqa: F401  (User.payments)
+from app.models.catalogo_version import CatalogoVersion
+from app.models.categorias import Categoria
+from app.models.curso_busqueda import CursoBusqueda
+from app.models.cursos import Curso
+from app.models.cursos_categorias import CursoCategoria
+from app.models.profesores import Profesor
+from app.services import importacion
+from app.services.importacion import importar
+
+TABLAS = [
+    Profesor.__table__, Categoria.__table__, Curso.__table__,
+    CursoCategoria.__table__, CursoBusqueda.__table__, CatalogoVersion.__table__,
+]
+
+ENCABEZADO = "titulo,descripcion,duracion,precio,nivel,profesor_id,categorias_id\n"
+
+
+class CuerpoEnBloques:
+    """Request mínimo: entrega el cuerpo en bloques de `tamano` bytes."""
+
+    def __init__(self, texto: str, tamano: int = 7):
+        self.datos = texto.encode("utf-8")
+        self.tamano = tamano
+
+    async def stream(self):
+        for i in range(0, len(self.datos), self.tamano):
+            yield self.datos[i:i + self.tamano]
+
+
+@pytest.fixture
+def session():
+    # procesar_lote corre en el threadpool
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine, tables=TABLAS)
+    with engine.begin() as conn:
+        conn.execute(insert(Profesor.__table__), [{"id": 1, "name": "Ana", "profesion": "Dev"}])
+        conn.execute(insert(Categoria.__table__), [
+            {"id": 1, "name": "Programación", "descripcion": "d"},
+            {"id": 2, "name": "Web", "descripcion": "d"},
+        ])
+        conn.execute(insert(CatalogoVersion.__table__), [{"id": 1, "version": 0}])
+    with Session(engine) as session:
+        yield session
+
+
+def importar_texto(session, texto: str, formato: str, tamano: int = 7) -> dict:
+    return asyncio.run(importar(CuerpoEnBloques(texto, tamano), session, formato))
+
+
+def test_csv_con_errores_por_fila(session):
+    texto = ENCABEZADO + (
+        "Python,Desde cero,10,100,Básico,1,1;2\n"
+        "\n"
+        "Sin profesor,d,1,1,,9,1\n"
+        "Columnas,de,más,1,1,1,1,1\n"
+        "Precio malo,d,1,abc,,1,\n"
+        "Categoría falta,d,1,1,,1,7\n"
+        "FastAPI,APIs,5,50,Avanzado,1,2\n"
+    )
+    resultado = importar_texto(session, texto, "csv")
+
+    assert resultado["creados"] == 2
+    assert [(e["linea"], e["error"]) for e in resultado["errores"] if isinstance(e["error"], str)] == [
+        (4, "Profesor con ID 9 no existe"),
+        (5, "Cantidad de columnas distinta a la del encabezado"),
+        (7, "Categorías inexistentes: [7]"),
+    ]
+    assert [e["linea"] for e in resultado["errores"]] == [4, 5, 6, 7]
+    assert sorted(session.exec(select(Curso.titulo)).all()) == ["FastAPI", "Python"]
+    documentos = session.exec(select(CursoBusqueda.documento)).all()
+    assert sorted(documentos) == ["FastAPI APIs Web Ana", "Python Desde cero Programación Web Ana"]
+
+
+def test_csv_campo_entre_comillas_con_saltos_de_linea(session):
+    texto = ENCABEZADO + (
+        '"Python","Primera línea\n\nTercera, con ""comillas""",10,100,Básico,1,1\n'
+        "Sin profesor,d,1,1,,9,1\n"
+        'Web,"Una\r\nDos",5,50,,1,2\n'
+    )
+    resultado = importar_texto(session, texto, "csv", tamano=3)
+
+    assert resultado["creados"] == 2
+    # La fila con el error empieza en la línea 5: la anterior ocupa las líneas 2 a 4
+    assert resultado["errores"] == [{"linea": 5, "error": "Profesor con ID 9 no existe"}]
+    descripciones = dict(session.exec(select(Curso.titulo, Curso.descripcion)).all())
+    assert descripciones == {"Python": 'Primera línea\n\nTercera, con "comillas"', "Web": "Una\nDos"}
+
+
+def test_csv_comilla_dentro_de_un_campo_sin_comillas(session):
+    # La comilla del medio es literal; la del último campo abre uno entre
+    # comillas que se cierra en la línea siguiente
+    texto = ENCABEZADO + 'Curso 5" pulgadas,d,1,1,,1,"1\n;2"\n'
+    resultado = importar_texto(session, texto, "csv")
+
+    assert resultado == {"creados": 1, "errores": [], "errores_omitidos": 0}
+    assert session.exec(select(Curso.titulo)).one() == 'Curso 5" pulgadas'
+
+
+def test_csv_comillas_sin_cerrar(session, monkeypatch):
+    monkeypatch.setattr(importacion, "MAX_LINEAS_FILA", 3)
+    texto = ENCABEZADO + 'Python,"abierta,1,1,,1,1\nuno\ndos\nSegundo,d,1,1,,1,1\nTercero,"sin cerrar\n'
+    resultado = importar_texto(session, texto, "csv")
+
+    assert resultado["creados"] == 1
+    assert resultado["errores"] == [
+        {"linea": 2, "error": "Campo entre comillas sin cerrar"},
+        {"linea": 6, "error": "Campo entre comillas sin cerrar"},
+    ]
+
+
+def test_ndjson_con_errores_y_lotes(session, monkeypatch):
+    monkeypatch.setattr(importacion, "TAMANO_LOTE", 2)
+    fila = {"titulo": "T", "descripcion": "d", "duracion": 1, "precio": 1, "profesor_id": 1, "categorias_id": [1]}
+    lineas = [json.dumps({**fila, "titulo": f"T{i}"}) for i in range(5)]
+    lineas.insert(1, "{no es json")
+    lineas.insert(3, "[1, 2]")
+    resultado = importar_texto(session, "\n".join(lineas), "ndjson")
+
+    assert resultado["creados"] == 5
+    assert resultado["errores"] == [
+        {"linea": 2, "error": "JSON inválido"},
+        {"linea": 4, "error": "Se esperaba un objeto JSON"},
+    ]
+    assert session.exec(select(CatalogoVersion.version)).one() == 3
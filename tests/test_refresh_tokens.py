@@ -0,0 +1,145 @@
+# tests/test_refresh_tokens.py
+
+# POST /refresh: cada uso rota el refresh token por uno nuevo de la misma
+# familia; presentar uno ya usado revoca la familia entera (alguien más tiene
+# una copia) y las otras sesiones del usuario siguen funcionando.
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import app.models.profiles  # noqa: F401  (User.profile)
+import app.models.user_payment  # noqa: F401  (User.payments)
+from app.auth.auth import decodificar_token, hash_refresh_token, nuevo_refresh_token, revocar_refresh_tokens
+from app.db.database import get_async_session
+from app.models.refresh_tokens import RefreshToken
+from app.models.users import User
+from app.router import auth
+
+TABLAS = [User.__table__, RefreshToken.__table__]
+
+
+class Base:
+    """Engine async en memoria y helpers para leerlo y escribirlo desde la prueba."""
+
+    def __init__(self):
+        self.engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        self.correr(self._crear())
+
+    def correr(self, corrutina):
+        return asyncio.run(corrutina)
+
+    async def _crear(self):
+        async with self.engine.begin() as conn:
+            await conn.run_sync(lambda c: SQLModel.metadata.create_all(c, tables=TABLAS))
+            await conn.execute(insert(User.__table__), [
+                {"id": 1, "username": "ana", "email": "ana@example.com", "password": "x", "role": "user", "token_version": 3},
+            ])
+
+    def login(self) -> str:
+        """Refresh token de una familia nueva, como el que entrega /login."""
+        async def emitir():
+            async with AsyncSession(self.engine) as session:
+                token = nuevo_refresh_token(session, 1)
+                await session.commit()
+            return token
+        return self.correr(emitir())
+
+    def ejecutar(self, stmt) -> None:
+        async def correr():
+            async with AsyncSession(self.engine) as session:
+                await session.exec(stmt)
+                await session.commit()
+        self.correr(correr())
+
+    def tokens(self) -> list:
+        async def leer():
+            async with AsyncSession(self.engine) as session:
+                return (await session.exec(select(RefreshToken).order_by(RefreshToken.id))).all()
+        return self.correr(leer())
+
+
+@pytest.fixture
+def base():
+    return Base()
+
+
+@pytest.fixture
+def cliente(base):
+    app = FastAPI()
+    app.include_router(auth.router)
+
+    async def sesion_de_prueba():
+        async with AsyncSession(base.engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_async_session] = sesion_de_prueba
+    return TestClient(app)
+
+
+def refrescar(cliente, token: str):
+    return cliente.post("/refresh", json={"refresh_token": token})
+
+
+def test_rotacion(cliente, base):
+    primero = base.login()
+
+    respuesta = refrescar(cliente, primero)
+    assert respuesta.status_code == 200
+    datos = respuesta.json()
+    segundo = datos["refresh_token"]
+    assert segundo != primero
+    acceso = decodificar_token(datos["access_token"])
+    assert (acceso.id, acceso.role, acceso.ver) == (1, "user", 3)
+
+    # El nuevo también rota; el usado queda marcado y los tres son de la misma familia
+    tercero = refrescar(cliente, segundo).json()["refresh_token"]
+    guardados = base.tokens()
+    assert [t.token_hash for t in guardados] == [hash_refresh_token(t) for t in (primero, segundo, tercero)]
+    assert [t.revocado for t in guardados] == [True, True, False]
+    assert len({t.familia for t in guardados}) == 1
+
+
+def test_reusar_un_token_revoca_toda_la_familia(cliente, base):
+    robado = base.login()
+    otra_sesion = base.login()
+    vigente = refrescar(cliente, robado).json()["refresh_token"]
+
+    # El token ya rotado vuelve a aparecer: alguien tiene una copia
+    respuesta = refrescar(cliente, robado)
+    assert respuesta.status_code == 401
+    assert respuesta.headers["www-authenticate"] == "Bearer"
+
+    # El que se había emitido en la rotación tampoco sirve ...
+    assert refrescar(cliente, vigente).status_code == 401
+    # ... pero la otra familia del mismo usuario (otro login) no se toca
+    assert refrescar(cliente, otra_sesion).status_code == 200
+
+
+def test_token_desconocido_o_vencido(cliente, base):
+    assert refrescar(cliente, "no-existe").status_code == 401
+
+    token = base.login()
+    base.ejecutar(
+        update(RefreshToken)
+        .where(RefreshToken.token_hash == hash_refresh_token(token))
+        .values(expira=datetime.utcnow() - timedelta(seconds=1))
+    )
+    respuesta = refrescar(cliente, token)
+    assert respuesta.status_code == 401
+    assert respuesta.json()["detail"] == "Refresh token vencido"
+
+
+def test_revocar_refresh_tokens_corta_todas_las_sesiones(cliente, base):
+    # Lo que hace update_user al cambiar la contraseña o el rol
+    tokens = [base.login(), base.login()]
+    base.ejecutar(revocar_refresh_tokens(1))
+    assert [refrescar(cliente, t).status_code for t in tokens] == [401, 401]
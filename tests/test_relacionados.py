@@ -0,0 +1,131 @@
+# tests/test_relacionados.py
+
+# Índice de cursos relacionados: después de una secuencia de cambios
+# incrementales (altas, cambios, bajas, categorías borradas) las listas tienen
+# que ser las mismas que las de un índice reconstruido desde la base.
+
+import random
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel
+
+import app.models.user_payment  # noqa: F401  (User.payments)
+from app.models.categorias import Categoria
+from app.models.cursos import Curso
+from app.models.cursos_categorias import CursoCategoria
+from app.models.profesores import Profesor
+from app.services import catalogo, relacionados
+from app.services.relacionados import IndiceRelacionados
+
+TABLAS = [Profesor.__table__, Categoria.__table__, Curso.__table__, CursoCategoria.__table__]
+NIVELES = ["Básico", "Intermedio", "Avanzado"]
+PROFESORES = range(1, 5)
+CATEGORIAS = range(1, 9)
+
+
+@pytest.fixture(autouse=True)
+def k_chico(monkeypatch):
+    # Listas cortas para que las altas desplacen vecinos y las bajas dejen lugar
+    monkeypatch.setattr(relacionados, "K_MAX", 3)
+    monkeypatch.setattr(catalogo, "version", lambda: 0)
+
+
+def base_con(cursos: dict):
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine, tables=TABLAS)
+    with engine.begin() as conn:
+        conn.execute(insert(Profesor.__table__), [{"id": p, "name": f"P{p}", "profesion": "x"} for p in PROFESORES])
+        conn.execute(insert(Categoria.__table__), [{"id": c, "name": f"C{c}", "descripcion": "x"} for c in CATEGORIAS])
+        if cursos:
+            conn.execute(insert(Curso.__table__), [
+                {"id": i, "titulo": "t", "descripcion": "d", "profesor_id": p, "nivel": n}
+                for i, (p, n, _) in cursos.items()
+            ])
+        enlaces = [{"curso_id": i, "categoria_id": c} for i, (_, _, cats) in cursos.items() for c in cats]
+        if enlaces:
+            conn.execute(insert(CursoCategoria.__table__), enlaces)
+    return engine
+
+
+def desde_la_base(cursos: dict) -> IndiceRelacionados:
+    """Índice reconstruido con reconstruir() desde una base con `cursos`."""
+    indice = IndiceRelacionados()
+    with Session(base_con(cursos)) as session:
+        indice.reconstruir(session)
+    return indice
+
+
+def listas(indice: IndiceRelacionados, cursos) -> dict:
+    return {i: indice.relacionados(i, relacionados.K_MAX) for i in cursos}
+
+
+def curso_al_azar(rnd: random.Random) -> tuple:
+    return (
+        rnd.choice(PROFESORES),
+        rnd.choice(NIVELES),
+        frozenset(rnd.sample(CATEGORIAS, rnd.randint(0, 3))),
+    )
+
+
+@pytest.mark.parametrize("semilla", range(5))
+def test_cambios_incrementales_igual_a_reconstruir(semilla):
+    rnd = random.Random(semilla)
+    cursos = {i: curso_al_azar(rnd) for i in range(1, 16)}
+    indice = desde_la_base(cursos)
+
+    siguiente = len(cursos) + 1
+    for _ in range(60):
+        operacion = rnd.random()
+        if operacion < 0.35:
+            cursos[siguiente] = curso_al_azar(rnd)
+            indice.actualizar(siguiente, *cursos[siguiente])
+            siguiente += 1
+        elif operacion < 0.7 and cursos:
+            curso_id = rnd.choice(list(cursos))
+            cursos[curso_id] = curso_al_azar(rnd)
+            indice.actualizar(curso_id, *cursos[curso_id])
+        elif operacion < 0.9 and cursos:
+            curso_id = rnd.choice(list(cursos))
+            del cursos[curso_id]
+            indice.quitar(curso_id)
+        else:
+            categoria_id = rnd.choice(CATEGORIAS)
+            cursos = {i: (p, n, cats - {categoria_id}) for i, (p, n, cats) in cursos.items()}
+            indice.quitar_categoria(categoria_id)
+
+        assert listas(indice, cursos) == listas(desde_la_base(cursos), cursos)
+
+
+def test_cambios_durante_la_reconstruccion_se_repiten():
+    rnd = random.Random(7)
+    en_la_base = {i: curso_al_azar(rnd) for i in range(1, 11)}
+    cursos = dict(en_la_base)
+    cursos[11] = (1, "Básico", frozenset({1, 2}))
+    cursos[3] = (2, "Avanzado", frozenset({1}))
+    del cursos[5]
+
+    indice = IndiceRelacionados()
+
+    def cambios():
+        # Llegan mientras reconstruir() lee la base, que todavía no los tiene
+        indice.actualizar(11, *cursos[11])
+        indice.actualizar(3, *cursos[3])
+        indice.quitar(5)
+
+    with Session(base_con(en_la_base)) as session:
+        exec_original = session.exec
+
+        def exec_y_cambiar(stmt):
+            resultado = exec_original(stmt)
+            if indice._diario == []:
+                cambios()
+            return resultado
+
+        session.exec = exec_y_cambiar
+        indice.reconstruir(session)
+
+    assert indice._diario is None
+    assert listas(indice, cursos) == listas(desde_la_base(cursos), cursos)
+    assert listas(desde_la_base(en_la_base), cursos) != listas(indice, cursos)
@@ -0,0 +1,140 @@
+# tests/test_replicas.py
+
+# Reparto de lecturas entre réplicas: round-robin, réplicas caídas, vuelta a la
+# primaria y lecturas en la primaria después de que el cliente escribe
+# (LecturasPrimariaMiddleware).
+
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlmodel import Session
+
+from app.core.middleware import LecturasPrimariaMiddleware
+from app.db import database
+from app.db.replicas import LecturasRequest, Replicas, lecturas_request
+
+VENTANA = 5
+
+
+def replicas_sqlite(n: int) -> Replicas:
+    return Replicas([create_engine("sqlite://") for _ in range(n)], [], reintento=30)
+
+
+# --- Replicas ---
+
+def test_round_robin():
+    replicas = replicas_sqlite(3)
+    assert [replicas.candidatas() for _ in range(3)] == [[0, 1, 2], [1, 2, 0], [2, 0, 1]]
+
+
+def test_replica_caida_se_saltea_hasta_el_reintento(monkeypatch):
+    replicas = replicas_sqlite(2)
+    replicas.marcar_caida(0)
+    assert replicas.candidatas() == [1]
+    assert replicas.candidatas() == [1]
+
+    reintento = time.monotonic() + replicas.reintento
+    monkeypatch.setattr(time, "monotonic", lambda: reintento + 1)
+    assert sorted(replicas.candidatas()) == [0, 1]
+
+
+def test_sin_replicas_vivas_lee_de_la_primaria():
+    replicas = replicas_sqlite(2)
+    replicas.marcar_caida(0)
+    replicas.marcar_caida(1)
+    assert replicas.candidatas() == []
+    assert Replicas([], [], reintento=30).candidatas() == []
+
+
+def test_commit_en_la_primaria_manda_el_resto_del_request_a_la_primaria():
+    replicas = replicas_sqlite(1)
+    primaria = create_engine("sqlite://")
+    replicas.vigilar_escrituras(primaria)
+
+    token = lecturas_request.set(LecturasRequest())
+    try:
+        assert replicas.candidatas() == [0]
+        with Session(primaria) as session:
+            session.execute(text("SELECT 1"))
+            session.commit()
+        assert replicas.candidatas() == []
+    finally:
+        lecturas_request.reset(token)
+    # Otro request (otro contexto) sigue leyendo de la réplica
+    assert replicas.candidatas() == [0]
+
+
+def test_read_session_vuelve_a_la_primaria_si_la_replica_no_responde(monkeypatch, tmp_path):
+    caida = create_engine(f"sqlite:///{tmp_path}/no/existe.db")
+    replicas = Replicas([caida], [], reintento=30)
+    primaria = create_engine("sqlite://")
+    monkeypatch.setattr(database, "replicas", replicas)
+    monkeypatch.setattr(database, "engine", primaria)
+
+    with database.read_session() as session:
+        assert session.get_bind() is primaria
+    assert replicas.candidatas() == []
+
+
+# --- LecturasPrimariaMiddleware ---
+
+@pytest.fixture
+def cliente():
+    replicas = replicas_sqlite(1)
+    primaria = create_engine("sqlite://")
+    replicas.vigilar_escrituras(primaria)
+
+    app = FastAPI()
+    app.add_middleware(LecturasPrimariaMiddleware, ventana=VENTANA)
+
+    @app.post("/escribir")
+    def escribir():
+        with Session(primaria) as session:
+            session.execute(text("SELECT 1"))
+            session.commit()
+        return {"replicas": replicas.candidatas()}
+
+    @app.get("/leer")
+    def leer():
+        return {"replicas": replicas.candidatas()}
+
+    return TestClient(app)
+
+
+def test_sin_escrituras_lee_de_las_replicas_y_no_marca(cliente):
+    respuesta = cliente.get("/leer")
+    assert respuesta.json() == {"replicas": [0]}
+    assert LecturasPrimariaMiddleware.HEADER not in respuesta.headers
+    assert "set-cookie" not in respuesta.headers
+
+
+def test_despues_de_escribir_el_cliente_lee_de_la_primaria(cliente):
+    respuesta = cliente.post("/escribir")
+    assert respuesta.json() == {"replicas": []}
+    hasta = float(respuesta.headers[LecturasPrimariaMiddleware.HEADER])
+    assert time.time() < hasta <= time.time() + VENTANA
+    assert f"Max-Age={VENTANA}" in respuesta.headers["set-cookie"]
+
+    # El TestClient devuelve la cookie como un navegador
+    assert cliente.get("/leer").json() == {"replicas": []}
+    cliente.cookies.clear()
+    assert cliente.get("/leer").json() == {"replicas": [0]}
+    # Un cliente sin cookies puede reenviar el header
+    marca = {LecturasPrimariaMiddleware.HEADER: respuesta.headers[LecturasPrimariaMiddleware.HEADER]}
+    assert cliente.get("/leer", headers=marca).json() == {"replicas": []}
+
+
+@pytest.mark.parametrize("marca", [
+    lambda: time.time() - 1,  # vencida
+    lambda: time.time() + VENTANA + 60,  # más lejana que la ventana
+    lambda: 9999999999,
+    lambda: "abc",
+])
+def test_marca_vencida_o_invalida_lee_de_las_replicas(cliente, marca):
+    headers = {LecturasPrimariaMiddleware.HEADER: str(marca())}
+    assert cliente.get("/leer", headers=headers).json() == {"replicas": [0]}
+    cliente.cookies.set(LecturasPrimariaMiddleware.NOMBRE, str(marca()))
+    assert cliente.get("/leer").json() == {"replicas": [0]}